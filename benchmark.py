@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from combined import (create_nx_dg, in_degree_similarity_check, intern_dependency_list, is_dag_dfs_rec_stack,
+                      is_weakly_connected_dfs_bfs, merge_dags_consistency_check)
+from symbols import PredecessorSetTable, SymbolTable
+from workloads import FAMILIES, generate_workload
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+
+def _best_time(function, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_workload(dependency_lists, repeats=3):
+    """
+    Times graph construction, every check and the merge on one workload.
+    The consistency check and the merge get fresh interning tables on every run, so
+    earlier runs do not warm them.
+    Args:
+        dependency_lists (list of dict): The graphs of the workload.
+        repeats (int): Runs per stage; the fastest one is reported.
+    Returns:
+        dict: Edges per second of each stage.
+    """
+    num_edges = sum(len(deps) for dependency_list in dependency_lists for deps in dependency_list.values())
+    symbols = SymbolTable()
+    interned = [intern_dependency_list(dependency_list, symbols) for dependency_list in dependency_lists]
+    graphs = [create_nx_dg(dependency_list, symbols=None) for dependency_list in interned]
+    stages = {
+        "create_nx_dg": lambda: [create_nx_dg(dependency_list, symbols=None) for dependency_list in interned],
+        "is_weakly_connected_dfs_bfs": lambda: [is_weakly_connected_dfs_bfs(G) for G in graphs if len(G)],
+        "is_dag_dfs_rec_stack": lambda: [is_dag_dfs_rec_stack(G) for G in graphs],
+        "in_degree_similarity_check": lambda: in_degree_similarity_check(graphs, PredecessorSetTable()),
+        "in_degree_similarity_check_arrays": lambda: in_degree_similarity_check(graphs, backend="arrays"),
+        "merge_dags_consistency_check": lambda: merge_dags_consistency_check(
+            *dependency_lists, symbols=SymbolTable(), pred_sets=PredecessorSetTable()),
+    }
+    return {stage: num_edges / max(_best_time(function, repeats), 1e-9) for stage, function in stages.items()}
+
+
+def run_benchmarks(families=FAMILIES, sizes=DEFAULT_SIZES, num_graphs=4, repeats=3, seed=0):
+    # Results are keyed "family/num_nodes" -> stage -> edges per second
+    results = {}
+    for family in families:
+        for num_nodes in sizes:
+            workload = generate_workload(family, num_nodes, num_graphs, seed)
+            results[f"{family}/{num_nodes}"] = benchmark_workload(workload, repeats)
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Lists the stages whose throughput dropped by more than threshold.
+    Args:
+        results (dict): Output of run_benchmarks.
+        baseline (dict): Earlier output of run_benchmarks.
+        threshold (float): Allowed relative drop, e.g. 0.2 for 20%.
+    Returns:
+        list: (workload, stage, baseline edges/sec, current edges/sec) of each regression.
+    """
+    regressions = []
+    for workload, stages in results.items():
+        for stage, throughput in stages.items():
+            expected = baseline.get(workload, {}).get(stage)
+            if expected is not None and throughput < expected * (1 - threshold):
+                regressions.append((workload, stage, expected, throughput))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark graph construction, checks and merging on synthetic workloads.")
+    parser.add_argument("--families", nargs="+", choices=FAMILIES, default=list(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="Nodes per graph")
+    parser.add_argument("--graphs", type=int, default=4, help="Graphs per workload")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default="benchmark_baseline.json", help="JSON file of baseline throughputs")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative throughput drop")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.families, args.sizes, args.graphs, args.repeats, args.seed)
+    for workload, stages in results.items():
+        for stage, throughput in stages.items():
+            print(f"{workload:<20} {stage:<36} {throughput:>14,.0f} edges/sec")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.threshold)
+        for workload, stage, expected, throughput in regressions:
+            print(f"REGRESSION {workload} {stage}: {throughput:,.0f} edges/sec, baseline {expected:,.0f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage is more than {args.threshold:.0%} below {args.baseline}")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
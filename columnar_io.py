@@ -0,0 +1,179 @@
+import networkx as nx
+import numpy as np
+
+from edge_arrays import (ID_MASK, csr_from_edges, is_dag_csr, pack_edges, predecessor_set_discrepancies, sorted_unique,
+                         unpack_edges, weak_component_labels)
+from symbols import SYMBOLS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Edge tables are parallel int64 arrays (src, dst) of interned IDs, meaning dst depends on src.
+# A src of -1 declares dst without adding an edge, so nodes without dependencies survive.
+DECLARATION = -1
+
+
+def edges_from_dependency_list(dependency_list):
+    # Converts an interned dependency list (e.g. a merged one) into an edge table
+    src = []
+    dst = []
+    for node, dependents in dependency_list.items():
+        if not dependents:
+            src.append(DECLARATION)
+            dst.append(node)
+        src.extend(dependents)
+        dst.extend([node] * len(dependents))
+    return np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+
+
+def _intern_dictionary(names, symbols):
+    return np.fromiter((symbols.intern(name) for name in names), dtype=np.int64, count=len(names))
+
+
+def _encode_dictionary(src, dst, symbols):
+    used = sorted_unique(np.concatenate([src[src != DECLARATION], dst]))
+    names = symbols.names_of(used.tolist())
+    src_codes = np.where(src == DECLARATION, DECLARATION, np.searchsorted(used, src))
+    return names, src_codes, np.searchsorted(used, dst)
+
+
+def read_edges_npz(path, symbols=SYMBOLS):
+    """
+    Reads an edge table saved by write_edges_npz.
+    Args:
+        path (str): Path of the .npz file with "names", "src" and "dst" arrays.
+        symbols (SymbolTable): Table used to intern the node names.
+    Returns:
+        tuple: (src, dst) int64 arrays of interned IDs.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        ids = _intern_dictionary(data["names"].tolist(), symbols)
+        src_codes = data["src"]
+        src = np.where(src_codes == DECLARATION, DECLARATION, ids[src_codes])
+        return src, ids[data["dst"]]
+
+
+def write_edges_npz(path, src, dst, symbols=SYMBOLS):
+    # Node names are stored once in a dictionary column; src and dst hold codes into it
+    names, src_codes, dst_codes = _encode_dictionary(src, dst, symbols)
+    np.savez(path, names=np.array(names, dtype=str), src=src_codes, dst=dst_codes)
+
+
+def read_edges_parquet(path, symbols=SYMBOLS):
+    """
+    Reads an edge table from Parquet string (or dictionary) columns "src" and "dst";
+    a null src declares dst. Requires pyarrow.
+    Args:
+        path (str): Path of the Parquet file.
+        symbols (SymbolTable): Table used to intern the node names.
+    Returns:
+        tuple: (src, dst) int64 arrays of interned IDs.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required to read Parquet edge tables")
+    table = pq.read_table(path, columns=["src", "dst"])
+    src_column, dst_column = (_decoded(table.column(name)) for name in ("src", "dst"))
+    names = pc.unique(pa.chunked_array(src_column.chunks + dst_column.chunks, type=src_column.type).drop_null())
+    ids = _intern_dictionary(names.to_pylist(), symbols)
+    src_codes = pc.index_in(src_column, value_set=names).to_numpy()
+    dst_codes = pc.index_in(dst_column, value_set=names).to_numpy()
+    declared = np.isnan(src_codes) if src_codes.dtype.kind == "f" else np.zeros(len(src_codes), dtype=bool)
+    src = np.where(declared, DECLARATION, ids[np.where(declared, 0, src_codes).astype(np.int64)])
+    return src, ids[dst_codes.astype(np.int64)]
+
+
+def _decoded(column):
+    if pa.types.is_dictionary(column.type):
+        return column.cast(column.type.value_type)
+    return column
+
+
+def write_edges_parquet(path, src, dst, symbols=SYMBOLS):
+    if pa is None:
+        raise ImportError("pyarrow is required to write Parquet edge tables")
+    names, src_codes, dst_codes = _encode_dictionary(src, dst, symbols)
+    dictionary = pa.array(names, type=pa.string())
+    table = pa.table({
+        "src": pa.DictionaryArray.from_arrays(pa.array(src_codes.astype(np.int32), mask=src_codes == DECLARATION),
+                                              dictionary),
+        "dst": pa.DictionaryArray.from_arrays(pa.array(dst_codes.astype(np.int32)), dictionary),
+    })
+    pq.write_table(table, path)
+
+
+def merge_edge_arrays(*edge_tables):
+    """
+    Vectorized equivalent of merge_dags_consistency_check over edge tables.
+    Args:
+        *edge_tables (tuple): (src, dst) array pairs.
+    Returns:
+        tuple: Deduplicated (src, dst) arrays sorted by dst, with declarations kept only
+        for nodes that have no dependencies.
+    """
+    src = np.concatenate([table[0] for table in edge_tables])
+    dst = np.concatenate([table[1] for table in edge_tables])
+    keys = sorted_unique(pack_edges(dst, np.where(src == DECLARATION, ID_MASK, src)))
+    dst, src = unpack_edges(keys)
+    declared = src == ID_MASK
+    # Declarations sort last in their dst group; drop them where the group has edges
+    redundant = declared.copy()
+    redundant[0:1] = False
+    redundant[1:] &= dst[1:] == dst[:-1]
+    keep = ~redundant
+    return np.where(declared, DECLARATION, src)[keep], dst[keep]
+
+
+def edge_table_discrepancies(*edge_tables):
+    """
+    Vectorized equivalent of in_degree_similarity_check over edge tables.
+    The tables' edges already are (graph, dst, src) triples, so they go straight to
+    predecessor_set_discrepancies without building any graph.
+    Args:
+        *edge_tables (tuple): (src, dst) array pairs, one per graph.
+    Returns:
+        dict: A dictionary containing node IDs with in-degree discrepancies.
+    """
+    graph_ids, dst, src = [], [], []
+    for graph_index, (table_src, table_dst) in enumerate(edge_tables):
+        edges = table_src != DECLARATION
+        # Repeated edges would count twice in a predecessor group's fingerprint
+        table_dst, table_src = unpack_edges(sorted_unique(pack_edges(table_dst[edges], table_src[edges])))
+        graph_ids.append(np.full(len(table_dst), graph_index, dtype=np.int64))
+        dst.append(table_dst)
+        src.append(table_src)
+    if not dst:
+        return {}
+    discrepant = predecessor_set_discrepancies(np.concatenate(graph_ids), np.concatenate(dst), np.concatenate(src))
+    return {node: "In-degree similarity discrepancy found" for node in discrepant.tolist()}
+
+
+def validate_edge_arrays(src, dst, num_nodes):
+    """
+    Runs the weak connectivity and acyclicity checks on an edge table.
+    Args:
+        src (np.ndarray): Dependency ID of each edge, or -1 for a declaration.
+        dst (np.ndarray): Dependent node ID of each edge.
+        num_nodes (int): Size of the node ID space.
+    Returns:
+        tuple: (weakly_connected, is_dag) booleans.
+    """
+    edges = src != DECLARATION
+    indptr, indices = csr_from_edges(dst[edges], src[edges], num_nodes)
+    present = np.zeros(num_nodes, dtype=bool)
+    present[src[edges]] = True
+    present[dst] = True
+    labels = weak_component_labels(indptr, indices)
+    return len(sorted_unique(labels[present])) <= 1, is_dag_csr(indptr, indices)
+
+
+def graph_from_edge_arrays(src, dst):
+    # Bulk networkx construction for callers that need a DiGraph
+    edges = src != DECLARATION
+    G = nx.DiGraph()
+    G.add_nodes_from(dst.tolist())
+    G.add_edges_from(zip(src[edges].tolist(), dst[edges].tolist()))
+    return G
@@ -1,31 +1,44 @@
 import networkx as nx
+import hashlib
+import heapq
 import itertools
+import json
+import numpy as np
 from pyvis.network import Network
+from symbols import PREDECESSOR_SETS, SYMBOLS
+from edge_arrays import fingerprint_discrepancies, fingerprint_groups
+from graph_builder import build_digraph
+from provenance import EdgeProvenance
+from shared_nodes import shared_graph_nodes
+
+
+# Replace node names in a dependency list with their interned IDs
+def intern_dependency_list(dependency_list, symbols=SYMBOLS):
+    intern = symbols.intern
+    return {intern(node): [intern(dependent) for dependent in dependents]
+            for node, dependents in dependency_list.items()}
 
 
 # Create a directed graph from a dependency list
-def create_nx_dg(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        G.add_node(node)  # Ensure all nodes are added
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
+# Nodes are interned IDs; pass symbols=None if the list is already interned
+def create_nx_dg(dependency_list, symbols=SYMBOLS):
+    if symbols is not None:
+        dependency_list = intern_dependency_list(dependency_list, symbols)
+    return build_digraph(dependency_list)
 
 
 # 1. Weak Connectivity Check: DFS/BFS
+# Explicit stacks keep deep dependency chains clear of the recursion limit
 def is_weakly_connected_dfs_bfs(G):
     undirected_G = G.to_undirected()  # Convert to undirected graph
     start_node = next(iter(undirected_G.nodes))  # Get any starting node
-    visited = set()
-
-    def dfs(node):
-        visited.add(node)
-        for neighbor in undirected_G.neighbors(node):
+    visited = {start_node}
+    stack = [start_node]
+    while stack:
+        for neighbor in undirected_G.neighbors(stack.pop()):
             if neighbor not in visited:
-                dfs(neighbor)
-
-    dfs(start_node)
+                visited.add(neighbor)
+                stack.append(neighbor)
     return len(visited) == len(G.nodes)  # Check if all nodes are visited
 
 
@@ -33,65 +46,158 @@ def is_weakly_connected_dfs_bfs(G):
 def is_dag_dfs_rec_stack(G):
     visited = set()
     rec_stack = set()
-
-    def dfs(node):
-        if node not in visited:
-            visited.add(node)
-            rec_stack.add(node)
-            for neighbor in G.neighbors(node):
-                if neighbor not in visited and dfs(neighbor):
-                    return True
-                elif neighbor in rec_stack:
-                    return True
-            rec_stack.remove(node)
-        return False
-
-    for node in G.nodes():
-        if dfs(node):
-            return False
+    for root in G.nodes():
+        if root in visited:
+            continue
+        visited.add(root)
+        rec_stack.add(root)
+        stack = [(root, iter(G.neighbors(root)))]
+        while stack:
+            node, neighbors = stack[-1]
+            for neighbor in neighbors:
+                if neighbor in rec_stack:
+                    return False
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    rec_stack.add(neighbor)
+                    stack.append((neighbor, iter(G.neighbors(neighbor))))
+                    break
+            else:
+                rec_stack.remove(node)
+                stack.pop()
     return True
 
 
 # 3. Dependency Consistency Check: In-Degree Similarity
-def build_in_degree_map(G):
-    return {node: set(G.predecessors(node)) for node in G.nodes}
-
-
-def in_degree_similarity_check(graphs):
+# Predecessor sets are hash-consed frozensets, so equal sets are the same object
+def build_in_degree_map(G, pred_sets=PREDECESSOR_SETS):
+    intern = pred_sets.intern
+    return {node: intern(G.predecessors(node)) for node in G.nodes}
+
+
+# backend="arrays" compares fingerprints of sorted edge arrays instead of building the maps.
+# Only nodes with predecessors in two or more graphs are compared; pass a dict as
+# overlap_stats to receive the shared_nodes statistics.
+def in_degree_similarity_check(graphs, pred_sets=PREDECESSOR_SETS, backend="sets", overlap_stats=None):
+    if backend not in ("sets", "arrays"):
+        raise ValueError(f"unknown backend {backend!r}")
+    if backend == "sets" or overlap_stats is not None:
+        shared, stats = shared_graph_nodes(graphs)
+        if overlap_stats is not None:
+            overlap_stats.update(stats)
+    if backend == "arrays":
+        return in_degree_array_discrepancies(graphs)
+    intern = pred_sets.intern
+    return in_degree_map_discrepancies([{node: intern(G._pred[node]) for node in shared if G._pred.get(node)}
+                                        for G in graphs], pred_sets)
+
+
+# Compares in-degree maps that were already built, e.g. ones kept from earlier checks
+def in_degree_map_discrepancies(all_in_degree_maps, pred_sets=PREDECESSOR_SETS):
     discrepancies = {}
-    all_in_degree_maps = [build_in_degree_map(G) for G in graphs]
-    node_names = set(itertools.chain(*[G.nodes for G in graphs]))
+    node_names = set(itertools.chain(*all_in_degree_maps))
+    empty = pred_sets.empty
     for node in node_names:
         in_degree_sets = []
         for in_degree_map in all_in_degree_maps:
-            in_degree_set = in_degree_map.get(node, set())
-            if in_degree_set != set():
+            in_degree_set = in_degree_map.get(node, empty)
+            if in_degree_set is not empty:
                 in_degree_sets.append(in_degree_set)
-        if in_degree_sets and not all(x == in_degree_sets[0] for x in in_degree_sets):
+        if in_degree_sets and not all(x is in_degree_sets[0] for x in in_degree_sets):
             discrepancies[node] = "In-degree similarity discrepancy found"
     return discrepancies
 
 
+def in_degree_array_discrepancies(graphs):
+    # Nodes must be interned integer IDs. The predecessor dicts already group edges by
+    # destination within a graph, so only the (node, graph) groups need sorting.
+    chain = itertools.chain.from_iterable
+    nodes = np.fromiter(chain(G._pred for G in graphs), dtype=np.int64)
+    group_sizes = np.fromiter(chain(map(len, G._pred.values()) for G in graphs), dtype=np.int64, count=len(nodes))
+    src = np.fromiter(chain(chain(G._pred.values()) for G in graphs), dtype=np.int64, count=int(group_sizes.sum()))
+    group_graphs = np.repeat(np.arange(len(graphs)), [len(G) for G in graphs])
+    non_empty = group_sizes > 0
+    group_sizes = group_sizes[non_empty]
+    discrepant = fingerprint_discrepancies(nodes[non_empty], group_graphs[non_empty],
+                                           fingerprint_groups(src, group_sizes), group_sizes)
+    return {node: "In-degree similarity discrepancy found" for node in discrepant.tolist()}
+
+
 # 4. DAG Merging: Dependency Aggregation Algorithm
-def merge_dags_consistency_check(*dependency_lists):
+# Pass an EdgeProvenance as provenance to record which lists declared each edge
+def merge_dags_consistency_check(*dependency_lists, symbols=SYMBOLS, provenance=None, pred_sets=PREDECESSOR_SETS):
     node_dependencies = {}
-    for dependency_list in dependency_lists:
+    intern = symbols.intern
+    for source_index, dependency_list in enumerate(dependency_lists):
         for node, dependents in dependency_list.items():
-            dependents_set = set(dependents)
+            node = intern(node)
+            dependents_set = pred_sets.intern(intern(dependent) for dependent in dependents)
+            if provenance is not None:
+                provenance.add_dependencies(source_index, node, dependents_set)
             if node not in node_dependencies:
                 node_dependencies[node] = dependents_set
             else:
-                node_dependencies[node] = node_dependencies[node].union(dependents_set)
+                node_dependencies[node] = pred_sets.union(node_dependencies[node], dependents_set)
 
     merged_dependency_list = {node: list(deps) for node, deps in node_dependencies.items()}
-    merged_graph = create_nx_dg(merged_dependency_list)
+    merged_graph = create_nx_dg(merged_dependency_list, symbols=None)
     return merged_graph, merged_dependency_list
 
 
+# Canonical merged output: topological order with ties broken by name, sorted dependencies
+def canonical_dependency_list(merged_dependency_list, symbols=SYMBOLS):
+    name_of = symbols.name_of
+    order = sorted(merged_dependency_list, key=name_of)
+    rank = {node: idx for idx, node in enumerate(order)}
+    remaining = {node: 0 for node in order}
+    dependents = {node: [] for node in order}
+    for node, deps in merged_dependency_list.items():
+        for dep in deps:
+            if dep in rank:
+                remaining[node] += 1
+                dependents[dep].append(node)
+
+    heap = [rank[node] for node in order if not remaining[node]]
+    heapq.heapify(heap)
+    canonical = {}
+    while heap:
+        node = order[heapq.heappop(heap)]
+        canonical[name_of(node)] = sorted(symbols.names_of(merged_dependency_list[node]))
+        for dependent in dependents[node]:
+            remaining[dependent] -= 1
+            if not remaining[dependent]:
+                heapq.heappush(heap, rank[dependent])
+    # Nodes on or behind a cycle have no topological position; append them by name
+    for node in order:
+        if name_of(node) not in canonical:
+            canonical[name_of(node)] = sorted(symbols.names_of(merged_dependency_list[node]))
+    return canonical
+
+
+def serialize_canonical(merged_dependency_list, symbols=SYMBOLS):
+    canonical = canonical_dependency_list(merged_dependency_list, symbols)
+    data = json.dumps(canonical, separators=(",", ":"), ensure_ascii=True).encode()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+# Resolve interned IDs back to node names at the reporting boundary
+def resolve_dependency_list(dependency_list, symbols=SYMBOLS):
+    return {symbols.name_of(node): symbols.names_of(dependents)
+            for node, dependents in dependency_list.items()}
+
+
+def resolve_discrepancies(discrepancies, symbols=SYMBOLS):
+    return {symbols.name_of(node): message for node, message in discrepancies.items()}
+
+
+def resolve_graph(G, symbols=SYMBOLS):
+    return nx.relabel_nodes(G, symbols.name_of, copy=True)
+
+
 # Function to plot a graph using pyvis
-def plot_graph_pyvis(G, file_name):
+def plot_graph_pyvis(G, file_name, symbols=SYMBOLS):
     net = Network(height='750px', width='100%', directed=True, notebook=False)
-    net.from_nx(G)
+    net.from_nx(resolve_graph(G, symbols))
     net.show(file_name, notebook=False)
     print(f"Graph has been plotted and saved as '{file_name}'.")
 
@@ -203,19 +309,25 @@ if __name__ == "__main__":
             exit()
 
     # 3. Dependency Consistency Check
-    discrepancies = in_degree_similarity_check(graphs)
+    overlap = {}
+    discrepancies = in_degree_similarity_check(graphs, overlap_stats=overlap)
+    print(f"Nodes compared: {overlap['shared_nodes']} of {overlap['nodes']} with dependencies")
     if discrepancies:
-        print("Dependency Consistency Check failed with discrepancies:", discrepancies)
+        print("Dependency Consistency Check failed with discrepancies:", resolve_discrepancies(discrepancies))
         print("Stopping execution.")
         exit()
     else:
         print("Dependency Consistency Check: Passed")
 
     # 4. DAG Merging
-    merged_graph, merged_dependencies = merge_dags_consistency_check(*dependency_lists)
-    print("\nMerged Dependency List:", merged_dependencies)
-    print("Merged DAG Nodes:", list(merged_graph.nodes))
-    print("Merged DAG Edges:", list(merged_graph.edges))
+    provenance = EdgeProvenance()
+    merged_graph, merged_dependencies = merge_dags_consistency_check(*dependency_lists, provenance=provenance)
+    print("\nMerged Dependency List:", resolve_dependency_list(merged_dependencies))
+    print("Merged DAG Nodes:", SYMBOLS.names_of(merged_graph.nodes))
+    print("Merged DAG Edges:", [(SYMBOLS.name_of(u), SYMBOLS.name_of(v)) for u, v in merged_graph.edges])
+    canonical_manifest, digest = serialize_canonical(merged_dependencies)
+    print("Canonical Merged Manifest:", canonical_manifest.decode())
+    print("Canonical Manifest SHA-256:", digest)
 
     # Check if the merged graph is a DAG
     if is_dag_dfs_rec_stack(merged_graph):
@@ -224,3 +336,6 @@ if __name__ == "__main__":
         plot_graph_pyvis(merged_graph, 'merged_dag.html')
     else:
         print("\nMerged graph is not a DAG. Cannot plot.")
+        for u, v in nx.find_cycle(merged_graph):
+            sources = [idx + 1 for idx in provenance.sources_of(u, v)]
+            print(f"Cycle edge {SYMBOLS.name_of(u)} -> {SYMBOLS.name_of(v)} declared by lists {sources}")
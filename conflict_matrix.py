@@ -0,0 +1,112 @@
+import itertools
+from collections import defaultdict
+
+import numpy as np
+
+from combined import build_in_degree_map
+
+# Universal hashing (a * x + b) mod p over 32-bit item hashes stays inside uint64
+_PRIME = (1 << 31) - 1
+_HASH_MASK = 0xFFFFFFFF
+_CHUNK = 4096
+
+
+def predecessor_map(G):
+    # Only nodes with predecessors take part in consistency checks
+    return {node: preds for node, preds in build_in_degree_map(G).items() if preds}
+
+
+def minhash_signatures(item_sets, num_perm=128, seed=1):
+    """
+    Builds a MinHash sketch for each set of hashable items.
+    Args:
+        item_sets (list of iterable): One collection of items per graph.
+        num_perm (int): Number of hash permutations per sketch.
+        seed (int): Seed for the permutation coefficients.
+    Returns:
+        np.ndarray: uint64 array of shape (len(item_sets), num_perm).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)[:, None]
+    b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)[:, None]
+    signatures = np.full((len(item_sets), num_perm), _PRIME, dtype=np.uint64)
+    for row, items in enumerate(item_sets):
+        hashes = np.fromiter((hash(item) & _HASH_MASK for item in items), dtype=np.uint64)
+        for start in range(0, len(hashes), _CHUNK):
+            chunk = hashes[None, start:start + _CHUNK]
+            np.minimum(signatures[row], ((a * chunk + b) % _PRIME).min(axis=1), out=signatures[row])
+    return signatures
+
+
+def lsh_candidate_pairs(signatures, bands):
+    """
+    Finds pairs of sketches that share at least one LSH band bucket.
+    Args:
+        signatures (np.ndarray): MinHash sketches, one row per graph.
+        bands (int): Number of bands; must divide the number of permutations.
+    Returns:
+        set: Pairs (i, j) with i < j that are likely to overlap.
+    """
+    num_rows, num_perm = signatures.shape
+    rows_per_band = num_perm // bands
+    empty = (signatures == _PRIME).all(axis=1)
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        band_slice = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        for row in range(num_rows):
+            if not empty[row]:
+                buckets[band_slice[row].tobytes()].append(row)
+        for members in buckets.values():
+            candidates.update(itertools.combinations(members, 2))
+    return candidates
+
+
+def lsh_threshold(num_perm=128, bands=64):
+    # Similarity at which the candidate probability rises fastest: (1 / bands) ** (1 / rows)
+    return (1 / bands) ** (bands / num_perm)
+
+
+def lsh_detection_probability(similarity, num_perm=128, bands=64):
+    # Chance that a pair with this Jaccard similarity shares at least one band bucket
+    return 1 - (1 - similarity ** (num_perm // bands)) ** bands
+
+
+def graph_conflict_matrix(graphs, num_perm=128, bands=64, seed=1):
+    """
+    Computes pairwise overlap and conflict counts for a list of graphs.
+    Candidate pairs come from LSH over node sketches, so pairs whose shared nodes all
+    disagree are still found; only candidates are compared exactly. A pair with node
+    Jaccard similarity s becomes a candidate with probability lsh_detection_probability(s),
+    which rises steeply around lsh_threshold(num_perm, bands) (about 0.125 with the
+    defaults); pairs below it are usually never compared, and are marked -1 in conflicts.
+    Args:
+        graphs (list of nx.DiGraph): List of directed graphs.
+        num_perm (int): Number of MinHash permutations.
+        bands (int): Number of LSH bands; fewer rows per band finds weaker overlaps.
+        seed (int): Seed for the MinHash permutations.
+    Returns:
+        tuple: (overlap, conflicts) k x k arrays holding the Jaccard overlap of the
+        nodes with predecessors and the number of nodes whose predecessor sets differ.
+        Pairs that were never compared have overlap 0 and conflicts -1, so they are not
+        mistaken for conflict-free pairs.
+    """
+    pred_maps = [predecessor_map(G) for G in graphs]
+    signatures = minhash_signatures([pred_map.keys() for pred_map in pred_maps], num_perm, seed)
+
+    k = len(graphs)
+    overlap = np.zeros((k, k))
+    conflicts = np.full((k, k), -1, dtype=np.int64)
+    np.fill_diagonal(overlap, 1.0)
+    np.fill_diagonal(conflicts, 0)
+    for i, j in lsh_candidate_pairs(signatures, bands):
+        map_i, map_j = pred_maps[i], pred_maps[j]
+        shared = map_i.keys() & map_j.keys()
+        if not shared:
+            conflicts[i, j] = conflicts[j, i] = 0
+            continue
+        overlap[i, j] = overlap[j, i] = len(shared) / (len(map_i) + len(map_j) - len(shared))
+        # Predecessor sets are hash-consed, so identity is equality
+        conflicts[i, j] = conflicts[j, i] = sum(map_i[node] is not map_j[node] for node in shared)
+    return overlap, conflicts
+
@@ -1,15 +1,10 @@
 import networkx as nx
+import os
+import sys
 
-def Create_nx_dg(dependency_list):
-    # Create a directed graph
-    G = nx.DiGraph()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as Create_nx_dg
 
-    # Add edges based on the dependency list
-    for node, dependents in dependency_list.items():
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-
-    return G
 
 # Conversion to Undirected Graph with DFS/BFS
 def is_weakly_connected_dfs_bfs(G):
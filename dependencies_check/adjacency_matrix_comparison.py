@@ -2,6 +2,11 @@ import networkx as nx
 import numpy as np
 import copy
 import itertools
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as create_nx_dg
 
 
 def adjacency_matrix_comparison(graphs):
@@ -55,15 +60,6 @@ def adjacency_matrix_comparison(graphs):
     return discrepancies
 
 
-def create_nx_dg(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        G.add_node(node)  # Ensure all nodes are added
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
-
-
 # Example Usage
 # Example Usage
 dependency_list1 = {'A': [], 'B': ['A'], 'C': ['B'], 'D': ['C']}
@@ -1,5 +1,9 @@
 import itertools
-import networkx as nx
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as create_nx_dg
 
 
 def build_in_degree_map(G):
@@ -53,15 +57,6 @@ def in_degree_similarity_check(graphs):
     return discrepancies
 
 
-def create_nx_dg(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        G.add_node(node)  # Ensure all nodes are added
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
-
-
 dependency_list1 = {'A': [], 'B': ['A'], 'C': ['B'], 'D': ['C']}
 dependency_list2 = {'A': [], 'B': ['A'], 'C': ['B'], 'X': ['B'], 'Y': ['C', 'X'], 'Z': ['Y']}
 dependency_list3 = {'T': [], 'B': ['A'], 'C': ['B']}
@@ -4,15 +4,12 @@ import itertools
 from collections import defaultdict
 import numpy as np
 import copy
+import os
+import sys
 
-
-def create_nx_dg(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        G.add_node(node)  # Ensure all nodes are added
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as create_nx_dg
+from shared_nodes import shared_graph_nodes
 
 
 def build_in_degree_map(G):
@@ -26,7 +23,8 @@ def build_in_degree_map(G):
 def in_degree_similarity_check(graphs):
     discrepancies = {}
     all_in_degree_maps = [build_in_degree_map(G) for G in graphs]
-    node_names = set(itertools.chain(*[G.nodes for G in graphs]))
+    # Nodes declared by a single graph cannot disagree, so only shared ones are compared
+    node_names, _ = shared_graph_nodes(graphs)
     for node in node_names:
         in_degree_sets = []
         for in_degree_map in all_in_degree_maps:
@@ -74,9 +72,9 @@ def hash_in_degree_set(in_degree_set):
 def signature_hashing_comparison(graphs):
     discrepancies = {}
     in_degree_hashes = defaultdict(set)
+    node_names, _ = shared_graph_nodes(graphs)
     for G in graphs:
         in_degree_map = build_in_degree_map(G)
-        node_names = set(itertools.chain(*[G.nodes for G in graphs]))
         for node in node_names:
             in_degree_set = in_degree_map.get(node, set())
             hash_signature = hash_in_degree_set(in_degree_set)
@@ -0,0 +1,137 @@
+import hashlib
+import itertools
+import json
+
+from shared_nodes import SharedNodeBloomFilter, nodes_with_predecessors, shared_graph_nodes
+from symbols import SYMBOLS
+
+
+class Discrepancy:
+    """
+    A node whose non-empty predecessor sets differ between graphs.
+    Holds references to the graphs' predecessor dicts, which it never modifies; the
+    grouping and the symmetric difference are only computed when first accessed.
+    """
+
+    __slots__ = ("node", "message", "_predecessors", "_groups", "_symmetric_difference")
+
+    def __init__(self, node, message, predecessors):
+        self.node = node
+        self.message = message
+        self._predecessors = predecessors
+        self._groups = None
+        self._symmetric_difference = None
+
+    @property
+    def graph_indices(self):
+        # Graphs with a non-empty predecessor set for the node
+        return [graph_index for graph_index, _ in self._predecessors]
+
+    @property
+    def groups(self):
+        # Graph indices grouped by identical predecessor sets
+        if self._groups is None:
+            groups = {}
+            for graph_index, preds in self._predecessors:
+                groups.setdefault(frozenset(preds), []).append(graph_index)
+            self._groups = list(groups.values())
+        return self._groups
+
+    @property
+    def symmetric_difference(self):
+        # Predecessors declared by some but not all of the disagreeing graphs
+        if self._symmetric_difference is None:
+            sets = [set(preds) for _, preds in self._predecessors]
+            self._symmetric_difference = set.union(*sets) - set.intersection(*sets)
+        return self._symmetric_difference
+
+    def to_dict(self, symbols=SYMBOLS):
+        return {
+            "node": symbols.name_of(self.node),
+            "message": self.message,
+            "groups": self.groups,
+            "symmetric_difference": sorted(symbols.names_of(self.symmetric_difference)),
+        }
+
+
+def _candidate_nodes(graphs, prefilter):
+    # Yields each node whose predecessors at least one other graph may also declare, once
+    if prefilter == "exact":
+        yield from shared_graph_nodes(graphs)[0]
+        return
+    node_arrays = [nodes_with_predecessors(G) for G in graphs]
+    if prefilter == "bloom":
+        bloom = SharedNodeBloomFilter(sum(map(len, node_arrays)))
+        for nodes in node_arrays:
+            bloom.add(nodes)
+        is_shared = bloom.might_be_shared
+    elif prefilter is None:
+        is_shared = lambda nodes: itertools.repeat(True)
+    else:
+        raise ValueError(f"unknown prefilter {prefilter!r}")
+    # Each node is handled by the first graph that declares predecessors for it
+    first_graph = {}
+    for graph_index, nodes in enumerate(node_arrays):
+        for node in nodes:
+            first_graph.setdefault(node, graph_index)
+    for graph_index, nodes in enumerate(node_arrays):
+        nodes = [node for node in nodes if first_graph[node] == graph_index]
+        yield from itertools.compress(nodes, is_shared(nodes))
+
+
+def _iter_discrepancies(graphs, message, key, prefilter="exact"):
+    pred_dicts = [G._pred for G in graphs]
+    for node in _candidate_nodes(graphs, prefilter):
+        predecessors = [(graph_index, preds) for graph_index, pred in enumerate(pred_dicts)
+                        if (preds := pred.get(node))]
+        if len(predecessors) < 2:
+            continue
+        expected = key(predecessors[0][1])
+        if any(key(preds) != expected for _, preds in predecessors[1:]):
+            yield Discrepancy(node, message, predecessors)
+
+
+def iter_in_degree_discrepancies(graphs, prefilter="exact"):
+    """
+    Streaming variant of in_degree_similarity_check.
+    Args:
+        graphs (list of nx.DiGraph): A list of directed graphs.
+        prefilter (str): How nodes declared by a single graph are skipped: "exact" counts
+            them with shared_nodes, "bloom" uses a SharedNodeBloomFilter, None compares all.
+    Yields:
+        Discrepancy: One record per node with in-degree discrepancies, in discovery order.
+    """
+    return _iter_discrepancies(graphs, "In-degree similarity discrepancy found", lambda preds: preds.keys(), prefilter)
+
+
+def iter_adjacency_discrepancies(graphs, prefilter="exact"):
+    # Streaming variant of adjacency_matrix_comparison; a node's adjacency column is the
+    # indicator vector of its predecessors, so only non-zero entries are compared
+    return _iter_discrepancies(graphs, "Adjacency matrix discrepancy found", lambda preds: preds.keys(), prefilter)
+
+
+def hash_in_degree_set(in_degree_set):
+    in_degree_str = ",".join(str(node) for node in sorted(in_degree_set))
+    return hashlib.md5(in_degree_str.encode()).hexdigest()
+
+
+def iter_signature_discrepancies(graphs, prefilter="exact"):
+    # Streaming variant of signature_hashing_comparison
+    return _iter_discrepancies(graphs, "Signature hashing discrepancy", hash_in_degree_set, prefilter)
+
+
+def write_discrepancy_report(discrepancies, file, symbols=SYMBOLS):
+    """
+    Writes discrepancy records as JSON lines, resolving node IDs to names.
+    Args:
+        discrepancies (iterable of Discrepancy): Records, e.g. from iter_in_degree_discrepancies.
+        file (file object): Text file to write to.
+        symbols (SymbolTable): The table that interned the graphs.
+    Returns:
+        int: Number of records written.
+    """
+    count = 0
+    for discrepancy in discrepancies:
+        file.write(json.dumps(discrepancy.to_dict(symbols)) + "\n")
+        count += 1
+    return count
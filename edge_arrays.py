@@ -0,0 +1,192 @@
+import numpy as np
+
+# Edge keys pack (dst, src) interned IDs into one uint64 so sorting groups edges by dst
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def pack_edges(dst, src):
+    return (np.asarray(dst, dtype=np.uint64) << np.uint64(ID_BITS)) | np.asarray(src, dtype=np.uint64)
+
+
+def unpack_edges(keys):
+    dst = (keys >> np.uint64(ID_BITS)).astype(np.int64)
+    src = (keys & np.uint64(ID_MASK)).astype(np.int64)
+    return dst, src
+
+
+def sorted_unique(values):
+    # Sort-based np.unique; faster than np.unique for large integer key arrays
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def csr_from_edges(rows, cols, num_nodes):
+    """
+    Builds compressed sparse row arrays from parallel edge arrays.
+    Args:
+        rows (np.ndarray): Row node ID of each edge.
+        cols (np.ndarray): Column node ID of each edge.
+        num_nodes (int): Size of the node ID space.
+    Returns:
+        tuple: (indptr, indices) with the columns of row r in indices[indptr[r]:indptr[r + 1]].
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return indptr, cols[order]
+
+
+def csr_gather(indptr, indices, rows):
+    # Concatenates the CSR rows listed in rows without a Python loop
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+    return np.asarray(indices[offsets], dtype=np.int64)
+
+
+# Below this many ready nodes, Kahn's algorithm runs node by node: a vectorized step costs
+# tens of microseconds however small its frontier, which dominates on deep, narrow graphs
+SMALL_FRONTIER = 256
+
+
+def is_dag_csr(indptr, indices, block_size=1 << 22):
+    """
+    Checks acyclicity of a CSR graph with Kahn's algorithm, removing a whole frontier of
+    ready nodes per vectorized step while it is wide and one node at a time while it is
+    narrow, so long chains cost O(1) per node instead of one numpy pass per level.
+    The check is direction agnostic, so a predecessor CSR works as well as a successor CSR.
+    Args:
+        indptr (np.ndarray): CSR row pointers.
+        indices (np.ndarray): CSR column indices; may be a np.memmap.
+        block_size (int): Number of indices read at a time when counting degrees.
+    Returns:
+        bool: True if the graph is a DAG (no cycles), False otherwise.
+    """
+    num_nodes = len(indptr) - 1
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    for start in range(0, len(indices), block_size):
+        degree += np.bincount(indices[start:start + block_size], minlength=num_nodes)
+
+    frontier = np.flatnonzero(degree == 0)
+    processed = 0
+    while len(frontier):
+        if len(frontier) >= SMALL_FRONTIER:
+            processed += len(frontier)
+            targets = csr_gather(indptr, indices, frontier)
+            np.subtract.at(degree, targets, 1)
+            touched = sorted_unique(targets)
+            frontier = touched[degree[touched] == 0]
+            continue
+        ready = frontier.tolist()
+        while ready and len(ready) < SMALL_FRONTIER:
+            node = ready.pop()
+            processed += 1
+            for target in indices[indptr[node]:indptr[node + 1]].tolist():
+                degree[target] -= 1
+                if not degree[target]:
+                    ready.append(target)
+        frontier = np.array(ready, dtype=np.int64)
+    return processed == num_nodes
+
+
+def weak_component_labels(indptr, indices):
+    """
+    Labels weakly connected components of a CSR graph, Shiloach-Vishkin style: every
+    round hooks the root of each edge's endpoint onto the smaller root across the edge,
+    then pointer jumping flattens the trees. Hooking roots rather than the endpoints
+    merges whole trees at once, so chains take a few rounds instead of one per node.
+    Args:
+        indptr (np.ndarray): CSR row pointers.
+        indices (np.ndarray): CSR column indices.
+    Returns:
+        np.ndarray: The smallest node ID of each node's component.
+    """
+    num_nodes = len(indptr) - 1
+    rows = np.repeat(np.arange(num_nodes), np.diff(indptr))
+    cols = np.asarray(indices, dtype=np.int64)
+    labels = np.arange(num_nodes)
+    while True:
+        # Labels are roots here; hooking only lowers them, so no cycles can form
+        row_roots, col_roots = labels[rows], labels[cols]
+        crossing = row_roots != col_roots
+        if not crossing.any():
+            return labels
+        row_roots, col_roots = row_roots[crossing], col_roots[crossing]
+        rows, cols = rows[crossing], cols[crossing]
+        np.minimum.at(labels, row_roots, col_roots)
+        np.minimum.at(labels, col_roots, row_roots)
+        # Pointer jumping: point every node straight at its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def splitmix64(values):
+    # SplitMix64 finalizer: a cheap, well-mixed 64-bit hash of every value
+    with np.errstate(over="ignore"):
+        z = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def fingerprint_groups(src, group_sizes):
+    # Order-independent fingerprint of each contiguous run of sources; runs must be non-empty
+    starts = np.cumsum(group_sizes) - group_sizes
+    return np.add.reduceat(splitmix64(src), starts)
+
+
+def fingerprint_discrepancies(group_nodes, group_graphs, fingerprints, group_sizes):
+    """
+    Finds nodes whose predecessor-group fingerprints differ between graphs.
+    Args:
+        group_nodes (np.ndarray): Node ID of each non-empty (node, graph) predecessor group.
+        group_graphs (np.ndarray): Graph index of each group.
+        fingerprints (np.ndarray): fingerprint_groups of each group.
+        group_sizes (np.ndarray): Number of predecessors in each group.
+    Returns:
+        np.ndarray: Sorted IDs of the nodes with a discrepancy.
+    """
+    order = np.lexsort((group_graphs, group_nodes))
+    nodes, fingerprints, group_sizes = group_nodes[order], fingerprints[order], group_sizes[order]
+    # A node's groups are adjacent after the sort; any change within a node is a discrepancy
+    differs = (nodes[1:] == nodes[:-1]) & ((fingerprints[1:] != fingerprints[:-1])
+                                           | (group_sizes[1:] != group_sizes[:-1]))
+    return sorted_unique(nodes[1:][differs])
+
+
+def predecessor_set_discrepancies(graph_ids, dst, src):
+    """
+    Finds nodes whose non-empty predecessor sets differ between graphs, given edge triples.
+    Edges are sorted by (dst, graph); every (dst, graph) group is fingerprinted by its size
+    and the wrapping sum of its hashed sources, which does not depend on edge order.
+    Nodes without predecessors in a graph form no group there, so empty sets are ignored.
+    Args:
+        graph_ids (np.ndarray): Graph index of each edge.
+        dst (np.ndarray): Destination node ID of each edge.
+        src (np.ndarray): Source node ID of each edge; no edge may repeat within a graph.
+    Returns:
+        np.ndarray: Sorted IDs of the nodes with a discrepancy.
+    """
+    if not len(dst):
+        return np.empty(0, dtype=np.int64)
+    graph_ids = np.asarray(graph_ids, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    order = np.lexsort((graph_ids, dst))
+    dst, graph_ids = dst[order], graph_ids[order]
+    new_group = np.ones(len(dst), dtype=bool)
+    new_group[1:] = (dst[1:] != dst[:-1]) | (graph_ids[1:] != graph_ids[:-1])
+    starts = np.flatnonzero(new_group)
+    group_sizes = np.diff(starts, append=len(dst))
+    fingerprints = fingerprint_groups(np.asarray(src)[order], group_sizes)
+    return fingerprint_discrepancies(dst[starts], graph_ids[starts], fingerprints, group_sizes)
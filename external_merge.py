@@ -0,0 +1,226 @@
+import os
+import tempfile
+from array import array
+
+import numpy as np
+
+from columnar_io import DECLARATION, edges_from_dependency_list, read_edges_npz, write_edges_npz
+from edge_arrays import ID_BITS, ID_MASK, is_dag_csr
+from symbols import SYMBOLS, SymbolTable
+
+# Record layout: uint64 key (dst << 32 | src) plus an int32 source-list index
+RECORD_BYTES = 12
+# A src of ID_MASK marks "node declared by this list" so nodes without dependencies survive
+DECLARED = ID_MASK
+
+
+class ExternalMerge:
+    """
+    Merges dependency lists whose edges do not fit in memory.
+    Edges are buffered up to memory_budget bytes, spilled to sorted run files in workdir,
+    and k-way merged into an on-disk CSR adjacency (predecessors grouped by node).
+    """
+
+    def __init__(self, workdir, memory_budget=64 << 20, symbols=SYMBOLS):
+        self.workdir = workdir
+        self.symbols = symbols
+        self.capacity = max(2, memory_budget // RECORD_BYTES)
+        self.runs = []
+        self._keys = array('Q')
+        self._sources = array('i')
+        os.makedirs(workdir, exist_ok=True)
+
+    def add(self, source_index, dependency_list):
+        intern = self.symbols.intern
+        for node, dependents in dependency_list.items():
+            base = intern(node) << ID_BITS
+            keys = [base | DECLARED]
+            keys.extend(base | intern(dependent) for dependent in dependents)
+            self._keys.extend(keys)
+            self._sources.extend([source_index] * len(keys))
+            if len(self._keys) >= self.capacity:
+                self._spill()
+
+    def add_edges(self, source_index, dst, src):
+        # Bulk path for interned edge arrays, e.g. from columnar inputs, whose
+        # DECLARATION rows (src == -1) become this module's DECLARED records
+        src = np.asarray(src, dtype=np.int64)
+        src = np.where(src == DECLARATION, DECLARED, src)
+        keys = (np.asarray(dst, dtype=np.uint64) << np.uint64(ID_BITS)) | src.astype(np.uint64)
+        for start in range(0, len(keys), self.capacity):
+            chunk = keys[start:start + self.capacity]
+            self._write_run(chunk, np.full(len(chunk), source_index, dtype=np.int32))
+
+    def _spill(self):
+        if not self._keys:
+            return
+        self._write_run(np.frombuffer(self._keys, dtype=np.uint64),
+                        np.frombuffer(self._sources, dtype=np.int32))
+        self._keys = array('Q')
+        self._sources = array('i')
+
+    def _write_run(self, keys, sources):
+        order = np.lexsort((sources, keys))
+        path = os.path.join(self.workdir, f"run_{len(self.runs):05d}")
+        np.save(path + "_keys.npy", keys[order])
+        np.save(path + "_sources.npy", sources[order])
+        self.runs.append(path)
+
+    def finish(self):
+        """
+        Merges all spilled runs and checks the result.
+        Returns:
+            ExternalMergeResult: The on-disk merged adjacency and its discrepancies.
+        """
+        self._spill()
+        num_nodes = len(self.symbols)
+        counts = np.zeros(num_nodes, dtype=np.int64)
+        declared = np.zeros(num_nodes, dtype=bool)
+        discrepancies = []
+        indices_path = os.path.join(self.workdir, "merged_indices.bin")
+
+        with open(indices_path, "wb") as indices_file:
+            for keys, sources in self._merge_runs():
+                _emit(keys, sources, counts, declared, discrepancies, indices_file)
+
+        for path in self.runs:
+            os.remove(path + "_keys.npy")
+            os.remove(path + "_sources.npy")
+        self.runs = []
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        if indptr[-1]:
+            indices = np.memmap(indices_path, dtype=np.int64, mode="r")
+        else:
+            indices = np.empty(0, dtype=np.int64)
+        discrepancies = np.concatenate(discrepancies) if discrepancies else np.empty(0, dtype=np.int64)
+        return ExternalMergeResult(indptr, indices, declared, discrepancies)
+
+    def _merge_runs(self):
+        # Yields sorted chunks that each hold complete dst groups
+        runs = [(np.load(path + "_keys.npy", mmap_mode="r"), np.load(path + "_sources.npy", mmap_mode="r"))
+                for path in self.runs]
+        positions = [0] * len(runs)
+        block = max(1, self.capacity // (2 * len(runs) + 1))
+        carry_keys = np.empty(0, dtype=np.uint64)
+        carry_sources = np.empty(0, dtype=np.int32)
+
+        while True:
+            active = [i for i, (keys, _) in enumerate(runs) if positions[i] < len(keys)]
+            if not active:
+                break
+            # Every record <= bound is already inside the current block of its run
+            bound = min(runs[i][0][min(positions[i] + block, len(runs[i][0])) - 1] for i in active)
+            key_parts, source_parts = [carry_keys], [carry_sources]
+            for i in active:
+                keys, sources = runs[i]
+                start = positions[i]
+                end = start + np.searchsorted(keys[start:start + block], bound, side="right")
+                key_parts.append(keys[start:end])
+                source_parts.append(sources[start:end])
+                positions[i] = end
+
+            keys = np.concatenate(key_parts)
+            sources = np.concatenate(source_parts)
+            order = np.lexsort((sources, keys))
+            keys, sources = keys[order], sources[order]
+            # The group of the bound's dst may continue in later blocks
+            cut = np.searchsorted(keys, np.uint64(int(bound) & ~ID_MASK), side="left")
+            yield keys[:cut], sources[:cut]
+            carry_keys, carry_sources = keys[cut:], sources[cut:]
+
+        yield carry_keys, carry_sources
+
+
+def _emit(keys, sources, counts, declared, discrepancies, indices_file):
+    if not len(keys):
+        return
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (sources[1:] != sources[:-1])
+    keys, sources = keys[keep], sources[keep]
+    dst = (keys >> np.uint64(ID_BITS)).astype(np.int64)
+    src = (keys & np.uint64(ID_MASK)).astype(np.int64)
+    declared[dst] = True
+
+    edges = src != DECLARED
+    keys, dst, src, sources = keys[edges], dst[edges], src[edges], sources[edges]
+    if not len(keys):
+        return
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(first)
+    edge_dst = dst[starts]
+    src[starts].tofile(indices_file)
+    counts += np.bincount(edge_dst, minlength=len(counts))
+
+    # Non-empty predecessor sets agree iff every edge into a node is declared by
+    # every source list that declares any edge into that node
+    sources_per_edge = np.diff(np.append(starts, len(keys)))
+    pairs = np.unique(np.stack([dst, sources]), axis=1)
+    nodes, sources_per_node = np.unique(pairs[0], return_counts=True)
+    expected = sources_per_node[np.searchsorted(nodes, edge_dst)]
+    discrepancies.append(np.unique(edge_dst[sources_per_edge != expected]))
+
+
+class ExternalMergeResult:
+    def __init__(self, indptr, indices, declared, discrepancy_nodes):
+        self.indptr = indptr
+        self.indices = indices
+        self.declared = declared
+        self.discrepancy_nodes = discrepancy_nodes
+
+    @property
+    def discrepancies(self):
+        return {int(node): "In-degree similarity discrepancy found" for node in self.discrepancy_nodes}
+
+    def predecessors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def is_dag(self):
+        return is_dag_csr(self.indptr, self.indices)
+
+    def iter_dependency_list(self):
+        for node in np.flatnonzero(self.declared):
+            yield int(node), self.predecessors(node).tolist()
+
+
+def external_merge(dependency_lists, workdir, memory_budget=64 << 20, symbols=SYMBOLS):
+    """
+    Merges dependency lists through sorted run files instead of in-memory sets.
+    Args:
+        dependency_lists (iterable of dict): Dependency lists; may be a lazy generator.
+        workdir (str): Directory for run files and the merged adjacency.
+        memory_budget (int): Approximate bytes of edge records held in memory at once.
+        symbols (SymbolTable): Table used to intern node names.
+    Returns:
+        ExternalMergeResult: The merged adjacency with consistency and cycle checks.
+    """
+    merge = ExternalMerge(workdir, memory_budget, symbols)
+    for source_index, dependency_list in enumerate(dependency_lists):
+        merge.add(source_index, dependency_list)
+    return merge.finish()
+
+
+def _columnar_round_trip():
+    # Merging edge tables read back from columnar_io must match merging the dependency lists
+    dependency_lists = [{"A": [], "B": ["A"], "C": ["A", "B"]}, {"B": ["A"], "D": [], "E": ["D", "C"]}]
+    with tempfile.TemporaryDirectory() as workdir:
+        symbols = SymbolTable()
+        expected = external_merge(dependency_lists, os.path.join(workdir, "lists"), symbols=symbols)
+        merge = ExternalMerge(os.path.join(workdir, "tables"), symbols=symbols)
+        for source_index, dependency_list in enumerate(dependency_lists):
+            interned = {symbols.intern(node): [symbols.intern(dependent) for dependent in dependents]
+                        for node, dependents in dependency_list.items()}
+            path = os.path.join(workdir, f"list_{source_index}.npz")
+            write_edges_npz(path, *edges_from_dependency_list(interned), symbols=symbols)
+            src, dst = read_edges_npz(path, symbols=symbols)
+            merge.add_edges(source_index, dst, src)
+        result = merge.finish()
+        assert dict(result.iter_dependency_list()) == dict(expected.iter_dependency_list())
+        assert result.discrepancies == expected.discrepancies and result.is_dag() == expected.is_dag()
+        return {symbols.name_of(node): symbols.names_of(deps) for node, deps in result.iter_dependency_list()}
+
+
+if __name__ == "__main__":
+    print("Columnar round trip:", _columnar_round_trip())
@@ -0,0 +1,210 @@
+import hashlib
+import itertools
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS graphs (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE
+);
+-- declared is 1 for the graph's dependency list keys, 0 for nodes only named as dependencies
+CREATE TABLE IF NOT EXISTS graph_nodes (
+    graph_id INTEGER NOT NULL REFERENCES graphs (id),
+    node INTEGER NOT NULL REFERENCES nodes (id),
+    declared INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (graph_id, node)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    graph_id INTEGER NOT NULL REFERENCES graphs (id),
+    dst INTEGER NOT NULL REFERENCES nodes (id),
+    src INTEGER NOT NULL REFERENCES nodes (id),
+    PRIMARY KEY (graph_id, dst, src)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst, src);
+CREATE INDEX IF NOT EXISTS edges_src ON edges (src);
+CREATE TABLE IF NOT EXISTS signatures (
+    graph_id INTEGER NOT NULL REFERENCES graphs (id),
+    node INTEGER NOT NULL REFERENCES nodes (id),
+    signature TEXT NOT NULL,
+    PRIMARY KEY (graph_id, node)
+) WITHOUT ROWID;
+-- Each merged edge with the number of graphs that declared it; the per-graph rows are its provenance
+CREATE VIEW IF NOT EXISTS merged_edges AS
+    SELECT dst, src, COUNT(*) AS num_sources FROM edges GROUP BY dst, src;
+"""
+
+
+class GraphStore:
+    """
+    Persists dependency graphs, their provenance and signatures in SQLite.
+    Node names are interned in the nodes table; edges are stored per graph as (dst, src).
+    """
+
+    def __init__(self, path=":memory:"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        if "declared" not in {row[1] for row in self.conn.execute("PRAGMA table_info(graph_nodes)")}:
+            self._add_declared_column()
+
+    def _add_declared_column(self):
+        # Stores written before the column existed: a node with edges into it was declared.
+        # Declared nodes without dependencies cannot be told apart and are marked undeclared.
+        with self.conn:
+            self.conn.execute("ALTER TABLE graph_nodes ADD COLUMN declared INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("UPDATE graph_nodes SET declared = 1 WHERE EXISTS "
+                              "(SELECT 1 FROM edges e WHERE e.graph_id = graph_nodes.graph_id AND e.dst = graph_nodes.node)")
+
+    def close(self):
+        self.conn.close()
+
+    def load_dependency_list(self, label, dependency_list):
+        """
+        Bulk-loads a dependency list as a graph, replacing any graph with the same label.
+        Args:
+            label (str): Unique name of the graph, e.g. the manifest path.
+            dependency_list (dict): Maps each node name to the names it depends on.
+        Returns:
+            int: The graph ID.
+        """
+        conn = self.conn
+        with conn:
+            self._delete_graph(label)
+            graph_id = conn.execute("INSERT INTO graphs (label) VALUES (?)", (label,)).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO nodes (name) VALUES (?)",
+                             ((name,) for name in _node_names(dependency_list)))
+            conn.executemany(
+                "INSERT OR IGNORE INTO graph_nodes (graph_id, node, declared) SELECT ?, id, ? FROM nodes WHERE name = ?",
+                ((graph_id, name in dependency_list, name) for name in _node_names(dependency_list)))
+            conn.executemany(
+                "INSERT OR IGNORE INTO edges (graph_id, dst, src) "
+                "SELECT ?, d.id, s.id FROM nodes d, nodes s WHERE d.name = ? AND s.name = ?",
+                ((graph_id, node, dependent)
+                 for node, dependents in dependency_list.items() for dependent in dependents))
+        return graph_id
+
+    def _delete_graph(self, label):
+        row = self.conn.execute("SELECT id FROM graphs WHERE label = ?", (label,)).fetchone()
+        if row is None:
+            return
+        for table in ("signatures", "edges", "graph_nodes"):
+            self.conn.execute(f"DELETE FROM {table} WHERE graph_id = ?", row)
+        self.conn.execute("DELETE FROM graphs WHERE id = ?", row)
+
+    def graph_ids(self):
+        return [graph_id for graph_id, in self.conn.execute("SELECT id FROM graphs ORDER BY id")]
+
+    def graph_label(self, graph_id):
+        return self.conn.execute("SELECT label FROM graphs WHERE id = ?", (graph_id,)).fetchone()[0]
+
+    def load_graph(self, graph_id):
+        # Rebuilds the dependency list of one graph by name
+        rows = self.conn.execute(
+            "SELECT dn.name, sn.name FROM graph_nodes gn "
+            "JOIN nodes dn ON dn.id = gn.node "
+            "LEFT JOIN edges e ON e.graph_id = gn.graph_id AND e.dst = gn.node "
+            "LEFT JOIN nodes sn ON sn.id = e.src "
+            "WHERE gn.graph_id = ? AND gn.declared ORDER BY gn.node", (graph_id,))
+        return {node: [src for _, src in group if src is not None]
+                for node, group in itertools.groupby(rows, key=lambda row: row[0])}
+
+    def predecessors(self, name, graph_id=None):
+        query = "SELECT DISTINCT s.name FROM edges e JOIN nodes d ON d.id = e.dst JOIN nodes s ON s.id = e.src WHERE d.name = ?"
+        params = (name,)
+        if graph_id is not None:
+            query += " AND e.graph_id = ?"
+            params += (graph_id,)
+        return {src for src, in self.conn.execute(query, params)}
+
+    def successors(self, name, graph_id=None):
+        query = "SELECT DISTINCT d.name FROM edges e JOIN nodes s ON s.id = e.src JOIN nodes d ON d.id = e.dst WHERE s.name = ?"
+        params = (name,)
+        if graph_id is not None:
+            query += " AND e.graph_id = ?"
+            params += (graph_id,)
+        return {dst for dst, in self.conn.execute(query, params)}
+
+    def sources_of(self, src_name, dst_name):
+        # Provenance: labels of the graphs that declared src -> dst
+        return [label for label, in self.conn.execute(
+            "SELECT g.label FROM edges e JOIN graphs g ON g.id = e.graph_id "
+            "JOIN nodes d ON d.id = e.dst JOIN nodes s ON s.id = e.src "
+            "WHERE d.name = ? AND s.name = ? ORDER BY g.id", (dst_name, src_name))]
+
+    def merged_dependency_list(self):
+        # Same keys as merge_dags_consistency_check: the nodes some graph declares
+        rows = self.conn.execute(
+            "SELECT DISTINCT dn.name, sn.name, gn.node FROM graph_nodes gn "
+            "JOIN nodes dn ON dn.id = gn.node "
+            "LEFT JOIN merged_edges m ON m.dst = gn.node "
+            "LEFT JOIN nodes sn ON sn.id = m.src WHERE gn.declared ORDER BY gn.node")
+        return {node: [src for _, src, _ in group if src is not None]
+                for node, group in itertools.groupby(rows, key=lambda row: row[0])}
+
+    def save_signatures(self, graph_id):
+        """
+        Computes and stores an MD5 signature of each node's sorted predecessor names.
+        Args:
+            graph_id (int): The graph to sign.
+        """
+        rows = self.conn.execute(
+            "SELECT e.dst, s.name FROM edges e JOIN nodes s ON s.id = e.src "
+            "WHERE e.graph_id = ? ORDER BY e.dst, s.name", (graph_id,))
+        signatures = ((graph_id, node, _hash_names(name for _, name in group))
+                      for node, group in itertools.groupby(rows, key=lambda row: row[0]))
+        with self.conn:
+            # Materialize first: the read cursor and the inserts share one connection
+            self.conn.executemany("INSERT OR REPLACE INTO signatures (graph_id, node, signature) VALUES (?, ?, ?)",
+                                  list(signatures))
+
+
+def _node_names(dependency_list):
+    seen = set(dependency_list)
+    yield from dependency_list
+    for dependents in dependency_list.values():
+        for dependent in dependents:
+            if dependent not in seen:
+                seen.add(dependent)
+                yield dependent
+
+
+def _hash_names(names):
+    return hashlib.md5(",".join(names).encode()).hexdigest()
+
+
+# Dependency Consistency Check pushed into SQL
+def build_in_degree_map_sql(store, graph_id):
+    rows = store.conn.execute(
+        "SELECT gn.node, e.src FROM graph_nodes gn "
+        "LEFT JOIN edges e ON e.graph_id = gn.graph_id AND e.dst = gn.node "
+        "WHERE gn.graph_id = ? ORDER BY gn.node", (graph_id,))
+    return {node: {src for _, src in group if src is not None}
+            for node, group in itertools.groupby(rows, key=lambda row: row[0])}
+
+
+def in_degree_similarity_check_sql(store, graph_ids=None):
+    """
+    SQL equivalent of in_degree_similarity_check over stored graphs.
+    Non-empty predecessor sets agree iff every edge into a node appears in every graph
+    that has any edge into that node, so the check is two GROUP BY counts.
+    Args:
+        store (GraphStore): The store holding the graphs.
+        graph_ids (list of int): Graphs to compare; defaults to all stored graphs.
+    Returns:
+        dict: A dictionary containing node names with in-degree discrepancies.
+    """
+    if graph_ids is None:
+        graph_ids = store.graph_ids()
+    graph_filter = ",".join("?" * len(graph_ids))
+    rows = store.conn.execute(
+        f"WITH selected AS (SELECT dst, src, graph_id FROM edges WHERE graph_id IN ({graph_filter})), "
+        "per_node AS (SELECT dst, COUNT(DISTINCT graph_id) AS n FROM selected GROUP BY dst), "
+        "per_edge AS (SELECT dst, COUNT(*) AS n FROM selected GROUP BY dst, src) "
+        "SELECT DISTINCT nodes.name FROM per_edge JOIN per_node USING (dst) "
+        "JOIN nodes ON nodes.id = per_edge.dst WHERE per_edge.n < per_node.n", graph_ids)
+    return {name: "In-degree similarity discrepancy found" for name, in rows}
@@ -0,0 +1,269 @@
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+from edge_arrays import pack_edges, sorted_unique, unpack_edges
+
+
+# Varint (LEB128) coding of uint64 arrays, vectorized over all values
+def encode_varints(values):
+    values = np.asarray(values, dtype=np.uint64)
+    if not len(values):
+        return b""
+    num_bytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        num_bytes += rest > 0
+        rest >>= np.uint64(7)
+    offsets = np.cumsum(num_bytes) - num_bytes
+    out = np.zeros(int(num_bytes.sum()), dtype=np.uint8)
+    for position in range(int(num_bytes.max())):
+        more = num_bytes > position
+        payload = (values[more] >> np.uint64(7 * position)) & np.uint64(0x7F)
+        continued = (num_bytes[more] > position + 1).astype(np.uint64) << np.uint64(7)
+        out[offsets[more] + position] = payload | continued
+    return out.tobytes()
+
+
+def decode_varints(buffer, offset, count):
+    """
+    Decodes count varints from a uint8 buffer.
+    Args:
+        buffer (np.ndarray): uint8 array holding the encoded data.
+        offset (int): Position of the first encoded byte.
+        count (int): Number of values to decode.
+    Returns:
+        tuple: (values, next_offset) with values as a uint64 array.
+    """
+    if not count:
+        return np.empty(0, dtype=np.uint64), offset
+    # A uint64 varint is at most 10 bytes, so only that much of the buffer is scanned
+    data = buffer[offset:offset + 10 * count]
+    ends = np.flatnonzero(data < 0x80)[:count]
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    size = int(ends[-1]) + 1
+    positions = np.arange(size) - np.repeat(starts, ends - starts + 1)
+    parts = (data[:size] & 0x7F).astype(np.uint64) << (7 * positions).astype(np.uint64)
+    return np.add.reduceat(parts, starts), offset + size
+
+
+def _encode_sorted(values):
+    # A section is its length followed by the gaps between consecutive sorted values
+    values = np.asarray(values, dtype=np.uint64)
+    return encode_varints([len(values)]) + encode_varints(np.diff(values, prepend=np.uint64(0)))
+
+
+def _decode_sorted(buffer, offset):
+    (count,), offset = decode_varints(buffer, offset, 1)
+    gaps, offset = decode_varints(buffer, offset, int(count))
+    return np.cumsum(gaps, dtype=np.uint64), offset
+
+
+def _apply(current, added, removed):
+    kept = current[~np.isin(current, removed)] if len(removed) else current
+    return sorted_unique(np.concatenate([kept, added])) if len(added) else kept
+
+
+class HistoryStore:
+    """
+    Stores successive merged DAG versions in a directory.
+    Every base_interval-th version is a full snapshot; the others hold node and edge
+    deltas against the previous version. Node sets and packed (dst << 32 | src) edge keys
+    are sorted, gap-encoded and varint-coded. An index maps every edge to the version
+    where it first appeared.
+    base_interval is fixed when the store is created and saved in meta.json, since file
+    names and version numbering depend on it; reopening with another value is an error.
+    """
+
+    def __init__(self, path, base_interval=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        versions = _version_numbers(path)
+        if versions != list(range(len(versions))):
+            raise ValueError(f"{path}: version files are not numbered 0..{len(versions) - 1}")
+        self.num_versions = len(versions)
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if base_interval is not None and base_interval != meta["base_interval"]:
+                raise ValueError(f"{path} was created with base_interval={meta['base_interval']}, not {base_interval}")
+            self.base_interval = meta["base_interval"]
+        else:
+            # New store, or one written before meta.json: its files must fit the interval
+            self.base_interval = base_interval or 16
+            for version in versions:
+                if not os.path.exists(self._version_path(version)):
+                    raise ValueError(f"{path}: version {version} does not match base_interval={self.base_interval}")
+            meta = None
+        self._names = []
+        self._ids = {}
+        names_path = os.path.join(path, "names.jsonl")
+        if os.path.exists(names_path):
+            with open(names_path) as f:
+                for line in f:
+                    name = json.loads(line)
+                    self._ids[name] = len(self._names)
+                    self._names.append(name)
+        self._first_seen = {}
+        index_path = os.path.join(path, "first_seen.idx")
+        if os.path.exists(index_path):
+            self._read_index(index_path, sized=meta is not None)
+        if meta is None:
+            if os.path.exists(index_path):
+                # Older indexes have no record lengths; rewrite them in the current layout
+                with open(index_path, "wb") as f:
+                    for version, keys in self._index_records():
+                        f.write(_index_record(version, keys))
+            with open(meta_path, "w") as f:
+                json.dump({"base_interval": self.base_interval}, f)
+        self._latest = self._read(self.num_versions - 1) if self.num_versions else (_EMPTY, _EMPTY)
+
+    def __len__(self):
+        return self.num_versions
+
+    def _read_index(self, index_path, sized):
+        # Each record is its byte length, the version and the keys first seen in it
+        buffer = np.fromfile(index_path, dtype=np.uint8)
+        offset = 0
+        while offset < len(buffer):
+            if sized:
+                (size,), offset = decode_varints(buffer, offset, 1)
+                record, offset = buffer[offset:offset + int(size)], offset + int(size)
+            else:
+                record = buffer[offset:]
+            (version,), end = decode_varints(record, 0, 1)
+            keys, end = _decode_sorted(record, end)
+            if not sized:
+                offset += end
+            self._first_seen.update(dict.fromkeys(keys.tolist(), int(version)))
+
+    def _index_records(self):
+        by_version = {}
+        for key, version in self._first_seen.items():
+            by_version.setdefault(version, []).append(key)
+        return [(version, sorted(keys)) for version, keys in sorted(by_version.items())]
+
+    def _version_path(self, version):
+        kind = "base" if version % self.base_interval == 0 else "delta"
+        return os.path.join(self.path, f"v{version:08d}.{kind}")
+
+    def _intern(self, name, new_names):
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+            new_names.append(name)
+        return node_id
+
+    def commit(self, dependency_list):
+        """
+        Appends a merged dependency list as the next version.
+        Args:
+            dependency_list (dict): Maps each node name to the names it depends on.
+        Returns:
+            int: The new version number.
+        """
+        new_names = []
+        dst, src = [], []
+        for node, dependents in dependency_list.items():
+            node_id = self._intern(node, new_names)
+            for dependent in dependents:
+                dst.append(node_id)
+                src.append(self._intern(dependent, new_names))
+        with open(os.path.join(self.path, "names.jsonl"), "a") as f:
+            f.writelines(json.dumps(name) + "\n" for name in new_names)
+
+        nodes = sorted_unique(np.fromiter((self._ids[node] for node in dependency_list), dtype=np.uint64))
+        keys = sorted_unique(pack_edges(dst, src))
+        old_nodes, old_keys = self._latest
+        added_keys = np.setdiff1d(keys, old_keys, assume_unique=True)
+
+        version = self.num_versions
+        if version % self.base_interval == 0:
+            data = _encode_sorted(nodes) + _encode_sorted(keys)
+        else:
+            data = (_encode_sorted(np.setdiff1d(nodes, old_nodes, assume_unique=True))
+                    + _encode_sorted(np.setdiff1d(old_nodes, nodes, assume_unique=True))
+                    + _encode_sorted(added_keys)
+                    + _encode_sorted(np.setdiff1d(old_keys, keys, assume_unique=True)))
+        with open(self._version_path(version), "wb") as f:
+            f.write(data)
+
+        first_keys = [key for key in added_keys.tolist() if key not in self._first_seen]
+        self._first_seen.update(dict.fromkeys(first_keys, version))
+        with open(os.path.join(self.path, "first_seen.idx"), "ab") as f:
+            f.write(_index_record(version, first_keys))
+
+        self._latest = (nodes, keys)
+        self.num_versions += 1
+        return version
+
+    def _read(self, version):
+        if not 0 <= version < self.num_versions:
+            raise IndexError(f"version {version} does not exist")
+        base = version - version % self.base_interval
+        buffer = np.fromfile(self._version_path(base), dtype=np.uint8)
+        nodes, offset = _decode_sorted(buffer, 0)
+        keys, _ = _decode_sorted(buffer, offset)
+        for delta in range(base + 1, version + 1):
+            buffer = np.fromfile(self._version_path(delta), dtype=np.uint8)
+            added_nodes, offset = _decode_sorted(buffer, 0)
+            removed_nodes, offset = _decode_sorted(buffer, offset)
+            added_keys, offset = _decode_sorted(buffer, offset)
+            removed_keys, _ = _decode_sorted(buffer, offset)
+            nodes = _apply(nodes, added_nodes, removed_nodes)
+            keys = _apply(keys, added_keys, removed_keys)
+        return nodes, keys
+
+    def load(self, version):
+        """
+        Reconstructs a version from its base snapshot and at most base_interval - 1 deltas.
+        Args:
+            version (int): The version number; negative values count from the latest.
+        Returns:
+            dict: The dependency list of that version, by name.
+        """
+        if version < 0:
+            version += self.num_versions
+        nodes, keys = self._read(version)
+        dependency_list = {self._names[node]: [] for node in nodes.tolist()}
+        dst, src = unpack_edges(keys)
+        for node, dependent in zip(dst.tolist(), src.tolist()):
+            dependency_list[self._names[node]].append(self._names[dependent])
+        return dependency_list
+
+    def first_appearance(self, src_name, dst_name):
+        # Version in which dst_name first depended on src_name, or None
+        if src_name not in self._ids or dst_name not in self._ids:
+            return None
+        return self._first_seen.get(int(pack_edges(self._ids[dst_name], self._ids[src_name])))
+
+    def diff(self, old_version, new_version):
+        _, old_keys = self._read(old_version)
+        _, new_keys = self._read(new_version)
+        return (self._edge_names(np.setdiff1d(new_keys, old_keys, assume_unique=True)),
+                self._edge_names(np.setdiff1d(old_keys, new_keys, assume_unique=True)))
+
+    def _edge_names(self, keys):
+        dst, src = unpack_edges(keys)
+        return [(self._names[u], self._names[v]) for u, v in zip(src.tolist(), dst.tolist())]
+
+
+_VERSION_FILE = re.compile(r"v(\d{8})\.(?:base|delta)$")
+
+
+def _version_numbers(path):
+    names = map(os.path.basename, glob.glob(os.path.join(path, "v*")))
+    return sorted(int(match.group(1)) for match in map(_VERSION_FILE.match, names) if match)
+
+
+def _index_record(version, keys):
+    body = encode_varints([version]) + _encode_sorted(keys)
+    return encode_varints([len(body)]) + body
+
+
+_EMPTY = np.empty(0, dtype=np.uint64)
@@ -1,13 +1,8 @@
-import networkx as nx
+import os
+import sys
 
-
-def Create_nx_DG(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        G.add_node(node)  # Ensure all nodes are added
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as Create_nx_DG
 
 
 def merge_dags_consistency_check(*dependency_lists):
@@ -0,0 +1,126 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from edge_arrays import (csr_from_edges, csr_gather, fingerprint_discrepancies, fingerprint_groups, is_dag_csr,
+                         sorted_unique, weak_component_labels)
+from symbols import SYMBOLS
+
+
+def graph_to_csr(G, num_nodes):
+    """
+    Converts an interned graph into predecessor CSR arrays over the shared ID space.
+    Args:
+        G (nx.DiGraph): A directed graph whose nodes are interned IDs.
+        num_nodes (int): Size of the node ID space.
+    Returns:
+        tuple: (indptr, indices, present) where indices[indptr[v]:indptr[v + 1]] are the
+        sorted predecessors of v and present marks the nodes of G.
+    """
+    edges = np.array(G.edges, dtype=np.int64).reshape(-1, 2)
+    indptr, indices = csr_from_edges(edges[:, 1], edges[:, 0], num_nodes)
+    present = np.zeros(num_nodes, dtype=bool)
+    present[np.fromiter(G.nodes, dtype=np.int64, count=len(G))] = True
+    return indptr, indices, present
+
+
+def csr_slice(indptr, indices, nodes):
+    # Restricts a CSR graph to a sorted node subset closed under its edges, renumbered 0..n-1
+    local_indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(indptr[nodes + 1] - indptr[nodes], out=local_indptr[1:])
+    local_indices = np.searchsorted(nodes, csr_gather(indptr, indices, nodes))
+    return local_indptr, local_indices
+
+
+def partition_components(labels, present, num_partitions):
+    """
+    Packs weak components into roughly equal partitions, largest component first.
+    Args:
+        labels (np.ndarray): Component label of every node ID.
+        present (np.ndarray): Mask of the nodes that belong to the graph.
+        num_partitions (int): Maximum number of partitions.
+    Returns:
+        list: Sorted node ID arrays, one per non-empty partition.
+    """
+    nodes = np.flatnonzero(present)
+    components, inverse, sizes = np.unique(labels[nodes], return_inverse=True, return_counts=True)
+    bins = [(0, i) for i in range(min(num_partitions, len(components)))]
+    assignment = np.empty(len(components), dtype=np.int64)
+    for component in np.argsort(-sizes, kind="stable"):
+        load, partition = heapq.heappop(bins)
+        assignment[component] = partition
+        heapq.heappush(bins, (load + sizes[component], partition))
+    node_partitions = assignment[inverse]
+    order = np.argsort(node_partitions, kind="stable")
+    splits = np.searchsorted(node_partitions[order], np.arange(1, len(bins)))
+    return np.split(nodes[order], splits)
+
+
+def _partition_is_dag(local_indptr, local_indices):
+    return is_dag_csr(local_indptr, local_indices)
+
+
+def _shard_discrepancies(first_node, shard_rows):
+    # shard_rows holds one (indptr, indices) slice per graph for the same node range;
+    # each non-empty row is one fingerprinted group, compared in a single pass per shard
+    num_rows = len(shard_rows[0][0]) - 1
+    group_sizes = np.concatenate([np.diff(indptr) for indptr, _ in shard_rows])
+    group_nodes = np.tile(np.arange(first_node, first_node + num_rows), len(shard_rows))
+    group_graphs = np.repeat(np.arange(len(shard_rows)), num_rows)
+    non_empty = group_sizes > 0
+    if not non_empty.any():
+        return []
+    group_sizes = group_sizes[non_empty]
+    src = np.concatenate([indices for _, indices in shard_rows])
+    return fingerprint_discrepancies(group_nodes[non_empty], group_graphs[non_empty],
+                                     fingerprint_groups(src, group_sizes), group_sizes).tolist()
+
+
+def partitioned_validation(graphs, max_workers=None, num_partitions=None, num_shards=None, symbols=SYMBOLS):
+    """
+    Runs the per-graph and cross-graph checks of combined.py in a process pool.
+    Each graph is split into partitions of whole weak components for the acyclicity check,
+    and the node ID space is split into shards for the consistency check.
+    Args:
+        graphs (list of nx.DiGraph): Directed graphs whose nodes are interned IDs.
+        max_workers (int): Number of worker processes; defaults to the CPU count.
+        num_partitions (int): Partitions per graph; defaults to four per worker.
+        num_shards (int): Node ID shards for the consistency check; defaults to four per worker.
+        symbols (SymbolTable): The table that interned the graphs.
+    Returns:
+        dict: "weakly_connected" and "is_dag" lists with one bool per graph, and the
+        "discrepancies" dict that in_degree_similarity_check would return.
+    """
+    max_workers = max_workers or os.cpu_count()
+    num_partitions = num_partitions or 4 * max_workers
+    num_shards = num_shards or 4 * max_workers
+    num_nodes = len(symbols)
+    csrs = [graph_to_csr(G, num_nodes) for G in graphs]
+    report = {"weakly_connected": [], "is_dag": [True] * len(graphs), "discrepancies": {}}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        dag_futures = []
+        for graph_index, (indptr, indices, present) in enumerate(csrs):
+            labels = weak_component_labels(indptr, indices)
+            report["weakly_connected"].append(len(sorted_unique(labels[present])) <= 1)
+            for nodes in partition_components(labels, present, num_partitions):
+                dag_futures.append((graph_index, executor.submit(_partition_is_dag, *csr_slice(indptr, indices, nodes))))
+
+        shard_futures = []
+        bounds = np.linspace(0, num_nodes, num_shards + 1).astype(np.int64)
+        for low, high in zip(bounds[:-1], bounds[1:]):
+            if low == high:
+                continue
+            shard_rows = [(indptr[low:high + 1] - indptr[low], indices[indptr[low]:indptr[high]])
+                          for indptr, indices, _ in csrs]
+            shard_futures.append(executor.submit(_shard_discrepancies, int(low), shard_rows))
+
+        for graph_index, future in dag_futures:
+            if not future.result():
+                report["is_dag"][graph_index] = False
+        for future in shard_futures:
+            for node in future.result():
+                report["discrepancies"][node] = "In-degree similarity discrepancy found"
+    return report
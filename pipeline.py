@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from combined import (create_nx_dg, intern_dependency_list, is_dag_dfs_rec_stack, is_weakly_connected_dfs_bfs,
+                      resolve_dependency_list, resolve_discrepancies)
+from symbols import SYMBOLS
+
+_DONE = object()
+
+
+# A manifest is a JSON object mapping each node to the list of nodes it depends on
+def read_manifest(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def parse_manifest(data):
+    return json.loads(data)
+
+
+def check_manifest(dependency_list):
+    # Raises ValueError unless the manifest maps node names to lists of node names
+    if not isinstance(dependency_list, dict):
+        raise ValueError("manifest must be a JSON object mapping node names to lists of node names")
+    for node, dependents in dependency_list.items():
+        if not isinstance(node, str) or not isinstance(dependents, list) \
+                or not all(isinstance(dependent, str) for dependent in dependents):
+            raise ValueError(f"manifest entry {node!r} must map a node name to a list of node names")
+
+
+def _parse_checked(data):
+    dependency_list = parse_manifest(data)
+    check_manifest(dependency_list)
+    return dependency_list
+
+
+def build_graph(dependency_list, symbols=SYMBOLS):
+    # Interning happens here only, so the symbol table is touched by one stage at a time
+    interned = intern_dependency_list(dependency_list, symbols)
+    return interned, create_nx_dg(interned, symbols=None)
+
+
+def validate_graph(G):
+    # An empty manifest has no start node for the connectivity search
+    if not len(G):
+        return True, True
+    return is_weakly_connected_dfs_bfs(G), is_dag_dfs_rec_stack(G)
+
+
+async def _load_stage(paths, out_queue, executor):
+    loop = asyncio.get_running_loop()
+    for index, path in enumerate(paths):
+        data = await loop.run_in_executor(executor, read_manifest, path)
+        await out_queue.put((index, data))
+    await out_queue.put(_DONE)
+
+
+async def _parse_stage(in_queue, out_queue, executor, paths):
+    # Malformed manifests stop the pipeline here, with their path, before anything is interned
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not _DONE:
+        index, data = item
+        try:
+            dependency_list = await loop.run_in_executor(executor, _parse_checked, data)
+        except ValueError as error:
+            raise ValueError(f"{paths[index]}: {error}") from error
+        await out_queue.put((index, dependency_list))
+    await out_queue.put(_DONE)
+
+
+async def _map_stage(in_queue, out_queue, executor, function):
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not _DONE:
+        index, value = item
+        await out_queue.put((index, await loop.run_in_executor(executor, function, value)))
+    await out_queue.put(_DONE)
+
+
+async def _validate_stage(in_queue, out_queue, executor, report):
+    loop = asyncio.get_running_loop()
+    while (item := await in_queue.get()) is not _DONE:
+        index, (interned, G) = item
+        weakly_connected, is_dag = await loop.run_in_executor(executor, validate_graph, G)
+        report["weakly_connected"].append(weakly_connected)
+        report["is_dag"].append(is_dag)
+        await out_queue.put((index, interned))
+    await out_queue.put(_DONE)
+
+
+def merge_manifest(interned, node_dependencies, first_predecessors, discrepancies):
+    # Incremental form of in_degree_similarity_check and merge_dags_consistency_check:
+    # every non-empty predecessor set must equal the first one seen for that node
+    for node, dependents in interned.items():
+        dependents_set = set(dependents)
+        node_dependencies.setdefault(node, set()).update(dependents_set)
+        if dependents_set:
+            expected = first_predecessors.setdefault(node, dependents_set)
+            if dependents_set != expected:
+                discrepancies[node] = "In-degree similarity discrepancy found"
+
+
+async def _merge_stage(in_queue, report, executor):
+    # Manifests are merged one at a time, so the executor never sees the state concurrently
+    loop = asyncio.get_running_loop()
+    node_dependencies = {}
+    first_predecessors = {}
+    while (item := await in_queue.get()) is not _DONE:
+        _, interned = item
+        await loop.run_in_executor(executor, merge_manifest, interned, node_dependencies, first_predecessors,
+                                   report["discrepancies"])
+    report["merged_dependencies"] = {node: list(deps) for node, deps in node_dependencies.items()}
+
+
+async def run_pipeline(paths, executor=None, queue_size=2):
+    """
+    Loads, parses, builds, validates and merges manifests with the stages running concurrently.
+    Bounded queues between stages apply backpressure, so at most about queue_size
+    manifests wait between any two stages.
+    Args:
+        paths (list of str): Paths of JSON dependency manifests.
+        executor (concurrent.futures.Executor): Thread pool for file reads and CPU-heavy
+            stages; defaults to the event loop's default executor.
+        queue_size (int): Capacity of each inter-stage queue.
+    Returns:
+        dict: Per-graph "weakly_connected" and "is_dag" lists, the "discrepancies" dict,
+        "merged_dependencies", "merged_graph" and "merged_is_dag", all keyed by interned IDs.
+    Raises:
+        ValueError: If a manifest is not valid JSON or not a mapping of node names to
+            lists of node names; the message starts with its path.
+    """
+    report = {"weakly_connected": [], "is_dag": [], "discrepancies": {}}
+    raw, parsed, built, validated = (asyncio.Queue(maxsize=queue_size) for _ in range(4))
+    stages = [asyncio.ensure_future(stage) for stage in (
+        _load_stage(paths, raw, executor),
+        _parse_stage(raw, parsed, executor, paths),
+        _map_stage(parsed, built, executor, build_graph),
+        _validate_stage(built, validated, executor, report),
+        _merge_stage(validated, report, executor),
+    )]
+    try:
+        await asyncio.gather(*stages)
+    except BaseException:
+        # The other stages would wait on their queues forever
+        for stage in stages:
+            stage.cancel()
+        raise
+    loop = asyncio.get_running_loop()
+    merged_graph = await loop.run_in_executor(executor, create_nx_dg, report["merged_dependencies"], None)
+    report["merged_graph"] = merged_graph
+    report["merged_is_dag"] = await loop.run_in_executor(executor, is_dag_dfs_rec_stack, merged_graph)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate and merge dependency manifests.")
+    parser.add_argument("manifests", nargs="+", help="JSON files mapping each node to its dependencies")
+    parser.add_argument("--queue-size", type=int, default=2)
+    args = parser.parse_args()
+
+    try:
+        report = asyncio.run(run_pipeline(args.manifests, queue_size=args.queue_size))
+    except ValueError as error:
+        sys.exit(f"Invalid manifest {error}")
+    for idx, (connected, is_dag) in enumerate(zip(report["weakly_connected"], report["is_dag"]), start=1):
+        print(f"Graph {idx} Weakly Connected: {connected}")
+        print(f"Graph {idx} Is DAG: {is_dag}")
+    if report["discrepancies"]:
+        print("Dependency Consistency Check failed with discrepancies:",
+              resolve_discrepancies(report["discrepancies"]))
+    else:
+        print("Dependency Consistency Check: Passed")
+    print("\nMerged Dependency List:", resolve_dependency_list(report["merged_dependencies"]))
+    print("Merged graph is a DAG:", report["merged_is_dag"])
@@ -0,0 +1,132 @@
+import numpy as np
+
+# Edge keys pack (src, dst) interned IDs into one uint64
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+_WORD_BITS = 64
+# Edges recorded since the last consolidation are buffered in Python lists up to this size
+_PENDING_LIMIT = 1 << 16
+
+
+class EdgeProvenance:
+    """
+    Records which input dependency lists declared each merged edge.
+    Edges are kept as a sorted uint64 key column with one row of a packed bit matrix per
+    edge, where bit i is set if list i declared it: one machine word per edge for up to
+    64 lists. New edges are buffered and folded into the columns on the next query.
+    """
+
+    def __init__(self):
+        self.num_sources = 0
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._bits = np.empty((0, 1), dtype=np.uint64)
+        self._pending_keys = []
+        self._pending_sources = []
+        self._chunks = []  # (keys, sources) arrays not yet consolidated
+        self._chunked = 0
+
+    def __len__(self):
+        self._consolidate()
+        return len(self._keys)
+
+    def add_dependencies(self, source_index, node, dependents):
+        self._pending_keys.extend((dependent << _ID_BITS) | node for dependent in dependents)
+        self._pending_sources.extend([source_index] * (len(self._pending_keys) - len(self._pending_sources)))
+        self.num_sources = max(self.num_sources, source_index + 1)
+        if len(self._pending_keys) >= _PENDING_LIMIT:
+            self._flush_pending()
+            # Consolidating once the buffer outgrows the columns keeps the total work O(E log E)
+            if self._chunked > max(len(self._keys), _PENDING_LIMIT):
+                self._consolidate()
+
+    def _flush_pending(self):
+        if self._pending_keys:
+            self._chunks.append((np.array(self._pending_keys, dtype=np.uint64),
+                                 np.array(self._pending_sources, dtype=np.int64)))
+            self._chunked += len(self._pending_keys)
+            self._pending_keys, self._pending_sources = [], []
+
+    def _consolidate(self):
+        self._flush_pending()
+        if not self._chunks:
+            return
+        new_keys = np.concatenate([keys for keys, _ in self._chunks])
+        sources = np.concatenate([sources for _, sources in self._chunks])
+        self._chunks, self._chunked = [], 0
+        num_words = max(1, -(-self.num_sources // _WORD_BITS))
+        keys, inverse = np.unique(np.concatenate([self._keys, new_keys]), return_inverse=True)
+        bits = np.zeros((len(keys), num_words), dtype=np.uint64)
+        old_rows = inverse[:len(self._keys)]
+        bits[old_rows, :self._bits.shape[1]] = self._bits
+        np.bitwise_or.at(bits, (inverse[len(self._keys):], sources // _WORD_BITS),
+                         np.uint64(1) << (sources % _WORD_BITS).astype(np.uint64))
+        self._keys, self._bits = keys, bits
+
+    def _row(self, src, dst):
+        self._consolidate()
+        key = np.uint64((src << _ID_BITS) | dst)
+        row = int(np.searchsorted(self._keys, key))
+        return row if row < len(self._keys) and self._keys[row] == key else None
+
+    def mask_of(self, src, dst):
+        row = self._row(src, dst)
+        if row is None:
+            return 0
+        return sum(int(word) << (_WORD_BITS * i) for i, word in enumerate(self._bits[row]))
+
+    def sources_of(self, src, dst):
+        """
+        Lists the input lists that declared the edge src -> dst.
+        Args:
+            src (int): Interned ID of the dependency.
+            dst (int): Interned ID of the dependent node.
+        Returns:
+            list: Indices of the dependency lists that declared the edge.
+        """
+        mask = self.mask_of(src, dst)
+        return [i for i in range(mask.bit_length()) if mask >> i & 1]
+
+    def _edges_where(self, rows):
+        keys = self._keys[rows]
+        return list(zip((keys >> np.uint64(_ID_BITS)).tolist(), (keys & np.uint64(_ID_MASK)).tolist()))
+
+    def _source_column(self, source_index):
+        self._consolidate()
+        if source_index >= self.num_sources:
+            return np.zeros(len(self._keys), dtype=bool), np.uint64(0)
+        bit = np.uint64(1) << np.uint64(source_index % _WORD_BITS)
+        return (self._bits[:, source_index // _WORD_BITS] & bit) != 0, bit
+
+    def edges_from(self, source_index):
+        declared, _ = self._source_column(source_index)
+        return self._edges_where(declared)
+
+    def edges_only_from(self, source_index):
+        declared, bit = self._source_column(source_index)
+        word = source_index // _WORD_BITS
+        expected = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        if word < len(expected):
+            expected[word] = bit
+        return self._edges_where(declared & (self._bits == expected).all(axis=1))
+
+    def edges_from_all(self):
+        self._consolidate()
+        full = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        for word in range(self._bits.shape[1]):
+            width = min(_WORD_BITS, self.num_sources - word * _WORD_BITS)
+            full[word] = (1 << width) - 1 if width > 0 else 0
+        return self._edges_where((self._bits == full).all(axis=1))
+
+    def to_arrays(self):
+        """
+        Exports provenance as columns for bulk analysis.
+        Returns:
+            tuple: (src, dst, bits) where src and dst are int64 arrays and bits is a
+            uint8 array of shape (num_edges, ceil(num_sources / 8)) packed with np.packbits.
+        """
+        self._consolidate()
+        src = (self._keys >> np.uint64(_ID_BITS)).astype(np.int64)
+        dst = (self._keys & np.uint64(_ID_MASK)).astype(np.int64)
+        mask_bytes = self._bits.astype("<u8").view(np.uint8).reshape(len(self._keys), 8 * self._bits.shape[1])
+        flags = np.unpackbits(mask_bytes, axis=1, bitorder="little")[:, :self.num_sources]
+        return src, dst, np.packbits(flags, axis=1)
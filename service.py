@@ -0,0 +1,426 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from combined import (build_in_degree_map, create_nx_dg, in_degree_map_discrepancies, intern_dependency_list,
+                      is_dag_dfs_rec_stack, is_weakly_connected_dfs_bfs, resolve_dependency_list,
+                      resolve_discrepancies, serialize_canonical)
+from pipeline import check_manifest, read_manifest
+from symbols import PredecessorSetTable, SymbolTable, outgrown
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class CachedManifest:
+    """
+    A parsed manifest with everything the checks derive from it: the interned dependency
+    list, its graph, the hash-consed in-degree map and the per-graph check results.
+    """
+
+    __slots__ = ("digest", "interned", "graph", "in_degree_map", "weakly_connected", "is_dag")
+
+    def __init__(self, digest, dependency_list, symbols, pred_sets):
+        self.digest = digest
+        self.interned = intern_dependency_list(dependency_list, symbols)
+        self.graph = create_nx_dg(self.interned, symbols=None)
+        self.in_degree_map = build_in_degree_map(self.graph, pred_sets)
+        if len(self.graph):
+            self.weakly_connected = is_weakly_connected_dfs_bfs(self.graph)
+            self.is_dag = is_dag_dfs_rec_stack(self.graph)
+        else:
+            self.weakly_connected = self.is_dag = True
+
+
+class CachedMerge:
+    __slots__ = ("digest", "merged_dependencies", "graph", "is_dag", "canonical_digest")
+
+    def __init__(self, digest, merged_dependencies, graph, is_dag, canonical_digest):
+        self.digest = digest
+        self.merged_dependencies = merged_dependencies
+        self.graph = graph
+        self.is_dag = is_dag
+        self.canonical_digest = canonical_digest
+
+
+def manifest_digest(dependency_list):
+    # Key order and whitespace do not change a manifest's digest
+    data = json.dumps(dependency_list, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def latency_summary(samples):
+    """
+    Summarizes latencies in seconds.
+    Args:
+        samples (iterable of float): Latencies in seconds.
+    Returns:
+        dict: Sample count and p50/p95/p99/max latencies in milliseconds.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    summary = {"count": len(ordered)}
+    for name, fraction in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        summary[name] = round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+    summary["max_ms"] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+class MergeService:
+    """
+    Long-lived validate/merge/query service over the checks in combined.py.
+    Parsed manifests and merged graphs stay warm in an LRU cache keyed by content digest.
+    Validate and merge requests that arrive within batch_window seconds of each other are
+    run as one batch on a single worker thread, which also keeps the symbol table
+    single-writer; each distinct manifest in a batch is built once.
+    The service owns its symbol and predecessor-set tables. Evicted manifests leave their
+    names and sets behind, so once those are most of the tables the cache is dropped and
+    a new generation of tables is started.
+    """
+
+    def __init__(self, batch_window=0.005, max_batch=64, cache_size=1024, latency_window=10000,
+                 symbols=None, pred_sets=None):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cache_size = cache_size
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.pred_sets = PredecessorSetTable() if pred_sets is None else pred_sets
+        self.generations = 1
+        self.cache = OrderedDict()  # digest -> CachedManifest or CachedMerge
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.latencies = {}  # endpoint -> recent latencies in seconds
+        self.latency_window = latency_window
+        self.batch_sizes = deque(maxlen=latency_window)
+        self.max_queue_depth = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._batcher_task = None
+
+    async def start(self, host="127.0.0.1", port=8787):
+        self._queue = asyncio.Queue()
+        self._batcher_task = asyncio.create_task(self._batcher())
+        return await asyncio.start_server(self._handle, host, port)
+
+    # HTTP/1.1 with keep-alive; every request and response body is JSON
+    async def _handle(self, reader, writer):
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                start = time.perf_counter()
+                url = urllib.parse.urlsplit(target)
+                status, payload = await self._dispatch(method, url.path, urllib.parse.parse_qs(url.query), body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                self._record_latency(url.path, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, params, body):
+        if path in ("/validate", "/merge"):
+            if method != "POST":
+                return 405, {"error": f"{path} expects POST"}
+            try:
+                return 200, await self.submit(path[1:], body)
+            except ValueError as error:
+                return 400, {"error": str(error)}
+            except KeyError as error:
+                return 404, {"error": f"unknown digest {error.args[0]}"}
+            except Exception as error:
+                return 500, {"error": f"{type(error).__name__}: {error}"}
+        if path in ("/query", "/stats"):
+            if method != "GET":
+                return 405, {"error": f"{path} expects GET"}
+            if path == "/stats":
+                return 200, self.stats()
+            if "digest" not in params:
+                return 400, {"error": "/query expects a digest parameter"}
+            try:
+                return 200, self.query(params["digest"][0], params.get("node", [None])[0])
+            except KeyError as error:
+                return 404, {"error": f"unknown digest or node {error.args[0]}"}
+        return 404, {"error": f"no endpoint {path}"}
+
+    async def submit(self, kind, body):
+        """
+        Queues a validate or merge request for the next batch.
+        Args:
+            kind (str): "validate" or "merge".
+            body (bytes): JSON object whose "manifests" list holds dependency lists, or the
+                digests of manifests the service has already seen.
+        Returns:
+            dict: The response payload.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((kind, body, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self._queue.get()]
+            # Give concurrent requests one window to join, then take whatever has arrived
+            await asyncio.sleep(self.batch_window)
+            while len(jobs) < self.max_batch and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+            self.batch_sizes.append(len(jobs))
+            # The worker is idle here, and queries run on this loop, so no one sees the swap
+            self._maybe_new_generation()
+            try:
+                results = await loop.run_in_executor(self.executor, self._run_batch, [job[:2] for job in jobs])
+            except Exception as error:
+                # Fail this batch's requests, but keep serving later ones
+                results = [(False, error)] * len(jobs)
+            for (_, _, future), (ok, result) in zip(jobs, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+
+    def _maybe_new_generation(self):
+        # Each cached graph node holds at most one symbol and one predecessor set
+        live = sum(entry.graph.number_of_nodes() for entry in self.cache.values())
+        if outgrown(self.symbols, live) or outgrown(self.pred_sets, live):
+            self.cache.clear()
+            self.symbols, self.pred_sets = SymbolTable(), PredecessorSetTable()
+            self.generations += 1
+
+    def _run_batch(self, jobs):
+        results = []
+        for kind, body in jobs:
+            try:
+                entries = [self._manifest(manifest) for manifest in self._parse_request(body)]
+                results.append((True, self._validate(entries) if kind == "validate" else self._merge(entries)))
+            except Exception as error:
+                # One bad request must not fail the others in its batch
+                results.append((False, error))
+        return results
+
+    @staticmethod
+    def _parse_request(body):
+        request = json.loads(body or b"{}")
+        manifests = request.get("manifests") if isinstance(request, dict) else None
+        if not isinstance(manifests, list):
+            raise ValueError('request body must be a JSON object with a "manifests" list')
+        return manifests
+
+    def _lookup(self, digest):
+        entry = self.cache[digest]
+        self.cache.move_to_end(digest)
+        return entry
+
+    def _store(self, entry):
+        self.cache[entry.digest] = entry
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return entry
+
+    def _manifest(self, manifest):
+        # A manifest is a dependency list, or the digest of one sent earlier
+        if isinstance(manifest, str):
+            entry = self._lookup(manifest)
+            if not isinstance(entry, CachedManifest):
+                raise KeyError(manifest)
+            self.cache_hits += 1
+            return entry
+        if not isinstance(manifest, dict):
+            raise ValueError("each manifest must be a JSON object or a manifest digest")
+        check_manifest(manifest)
+        digest = manifest_digest(manifest)
+        if digest in self.cache:
+            self.cache_hits += 1
+            return self._lookup(digest)
+        self.cache_misses += 1
+        return self._store(CachedManifest(digest, manifest, self.symbols, self.pred_sets))
+
+    def _validate(self, entries):
+        discrepancies = in_degree_map_discrepancies([entry.in_degree_map for entry in entries], self.pred_sets)
+        return {
+            "graphs": [{"digest": entry.digest, "weakly_connected": entry.weakly_connected, "is_dag": entry.is_dag}
+                       for entry in entries],
+            "discrepancies": resolve_discrepancies(discrepancies, self.symbols),
+        }
+
+    def _merge(self, entries):
+        digest = hashlib.sha256("merge:".join(entry.digest for entry in entries).encode()).hexdigest()
+        if digest in self.cache:
+            self.cache_hits += 1
+            merge = self._lookup(digest)
+        else:
+            self.cache_misses += 1
+            # Same aggregation as merge_dags_consistency_check, from the warm in-degree maps
+            union, empty = self.pred_sets.union, self.pred_sets.empty
+            node_dependencies = {}
+            for entry in entries:
+                for node in entry.interned:
+                    node_dependencies[node] = union(node_dependencies.get(node, empty), entry.in_degree_map[node])
+            merged_dependencies = {node: list(deps) for node, deps in node_dependencies.items()}
+            graph = create_nx_dg(merged_dependencies, symbols=None)
+            is_dag = is_dag_dfs_rec_stack(graph) if len(graph) else True
+            _, canonical_digest = serialize_canonical(merged_dependencies, self.symbols)
+            merge = self._store(CachedMerge(digest, merged_dependencies, graph, is_dag, canonical_digest))
+        return {
+            "digest": merge.digest,
+            "merged_dependencies": resolve_dependency_list(merge.merged_dependencies, self.symbols),
+            "merged_is_dag": merge.is_dag,
+            "canonical_sha256": merge.canonical_digest,
+        }
+
+    def query(self, digest, node=None):
+        """
+        Looks up a cached manifest graph or merged graph.
+        Args:
+            digest (str): Digest returned by validate or merge.
+            node (str): Optional node name whose neighbours to return.
+        Returns:
+            dict: Graph sizes, or the node's predecessors and successors by name.
+        """
+        G = self._lookup(digest).graph
+        if node is None:
+            return {"digest": digest, "nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+        node_id = self.symbols.id_of(node)
+        if node_id not in G:
+            raise KeyError(node)
+        return {
+            "digest": digest,
+            "node": node,
+            "predecessors": sorted(self.symbols.names_of(G.predecessors(node_id))),
+            "successors": sorted(self.symbols.names_of(G.successors(node_id))),
+        }
+
+    def _record_latency(self, endpoint, seconds):
+        samples = self.latencies.get(endpoint)
+        if samples is None:
+            samples = self.latencies[endpoint] = deque(maxlen=self.latency_window)
+        samples.append(seconds)
+
+    def stats(self):
+        return {
+            "latency": {endpoint: latency_summary(samples) for endpoint, samples in sorted(self.latencies.items())},
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": len(self.batch_sizes),
+            "mean_batch_size": round(sum(self.batch_sizes) / len(self.batch_sizes), 3) if self.batch_sizes else 0,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "symbols": len(self.symbols),
+            "generations": self.generations,
+        }
+
+
+async def serve(host, port, **options):
+    service = MergeService(**options)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{port} (POST /validate, POST /merge, GET /query, GET /stats)")
+    async with server:
+        await server.serve_forever()
+
+
+async def _request(reader, writer, method, path, body=b""):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load_test(host, port, manifests, endpoint="/validate", num_requests=1000, concurrency=32, cold=False):
+    """
+    Sends num_requests requests over concurrency keep-alive connections and measures throughput.
+    Args:
+        host (str): Service host.
+        port (int): Service port.
+        manifests (list of dict): Dependency lists sent with every request.
+        endpoint (str): "/validate" or "/merge".
+        num_requests (int): Total number of requests.
+        concurrency (int): Number of concurrent connections.
+        cold (bool): Add a unique node to every request so no manifest is served from cache.
+    Returns:
+        dict: Requests per second, latency percentiles, error count and the service's stats.
+    """
+    warm_body = json.dumps({"manifests": manifests}).encode()
+    latencies = []
+    errors = 0
+    counter = iter(range(num_requests))
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for index in counter:
+                body = warm_body
+                if cold:
+                    body = json.dumps({"manifests": [{**manifests[0], f"__load_{index}": []}, *manifests[1:]]}).encode()
+                start = time.perf_counter()
+                status, _ = await _request(reader, writer, "POST", endpoint, body)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    _, stats = await _request(reader, writer, "GET", "/stats")
+    writer.close()
+    return {"requests": len(latencies), "errors": errors, "seconds": round(elapsed, 3),
+            "requests_per_sec": round(len(latencies) / elapsed, 1), "latency": latency_summary(latencies),
+            "service": json.loads(stats)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local dependency merge-and-validate service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8787)
+    serve_parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    serve_parser.add_argument("--max-batch", type=int, default=64)
+    serve_parser.add_argument("--cache-size", type=int, default=1024)
+    load_parser = commands.add_parser("load", help="Load-test a running service")
+    load_parser.add_argument("manifests", nargs="+", help="JSON files mapping each node to its dependencies")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=8787)
+    load_parser.add_argument("--endpoint", choices=["/validate", "/merge"], default="/validate")
+    load_parser.add_argument("--requests", type=int, default=1000)
+    load_parser.add_argument("--concurrency", type=int, default=32)
+    load_parser.add_argument("--cold", action="store_true", help="Defeat the manifest cache")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, batch_window=args.batch_window_ms / 1000,
+                          max_batch=args.max_batch, cache_size=args.cache_size))
+    else:
+        manifests = [json.loads(read_manifest(path)) for path in args.manifests]
+        result = asyncio.run(load_test(args.host, args.port, manifests, args.endpoint, args.requests,
+                                       args.concurrency, args.cold))
+        print(json.dumps(result, indent=2))
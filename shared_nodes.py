@@ -0,0 +1,99 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from edge_arrays import splitmix64
+
+# A node whose predecessors are declared by at most one graph can never be inconsistent,
+# so consistency checks only need to compare the nodes found here.
+
+
+def nodes_with_predecessors(G):
+    return [node for node, preds in G._pred.items() if preds]
+
+
+def shared_nodes(node_arrays):
+    """
+    Finds the nodes that occur in two or more of the per-graph node arrays.
+    Interned integer IDs are counted with np.unique; any other node names (tuples, mixed
+    types) are counted with a Counter, so they are compared exactly as the graphs key them.
+    Args:
+        node_arrays (list of array-like): Distinct node IDs (or names) of each graph,
+            e.g. from nodes_with_predecessors.
+    Returns:
+        tuple: (shared, stats) with the list of shared nodes, sorted for integer IDs, and a
+        dict of overlap statistics: graphs, nodes, shared_nodes, shared_fraction and
+        max_multiplicity.
+    """
+    try:
+        arrays = [np.asarray(nodes) for nodes in node_arrays if len(nodes)]
+        integer_ids = all(array.ndim == 1 and array.dtype.kind in "iu" for array in arrays)
+    except ValueError:
+        # Tuples of different lengths do not form an array
+        integer_ids = False
+    if integer_ids:
+        if arrays:
+            nodes, counts = np.unique(np.concatenate(arrays), return_counts=True)
+            shared = nodes[counts >= 2].tolist()
+        else:
+            shared, counts = [], np.empty(0, dtype=np.int64)
+    else:
+        multiplicity = Counter(node for nodes in node_arrays for node in nodes)
+        shared = [node for node, count in multiplicity.items() if count >= 2]
+        counts = np.fromiter(multiplicity.values(), dtype=np.int64, count=len(multiplicity))
+    stats = {
+        "graphs": len(node_arrays),
+        "nodes": len(counts),
+        "shared_nodes": len(shared),
+        "shared_fraction": round(len(shared) / len(counts), 6) if len(counts) else 0.0,
+        "max_multiplicity": int(counts.max()) if len(counts) else 0,
+    }
+    return shared, stats
+
+
+def shared_graph_nodes(graphs):
+    # shared_nodes over the nodes with non-empty predecessor sets of each graph
+    return shared_nodes([nodes_with_predecessors(G) for G in graphs])
+
+
+class SharedNodeBloomFilter:
+    """
+    Streaming form of shared_nodes for interned IDs: graphs are added one at a time and
+    only two Bloom filters are kept, one of nodes seen in some graph and one of nodes
+    seen in two. might_be_shared has no false negatives; a false positive only costs one
+    extra comparison, so the checks' output does not change.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._seen = np.zeros((self.num_bits + 63) // 64, dtype=np.uint64)
+        self._shared = np.zeros_like(self._seen)
+
+    def _positions(self, node_ids):
+        # Double hashing: position i is h1 + i * h2 modulo the filter size
+        first = splitmix64(node_ids)
+        second = splitmix64(first ^ np.uint64(0x5DEECE66D)) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            positions = [(first + np.uint64(i) * second) % np.uint64(self.num_bits) for i in range(self.num_hashes)]
+        return np.stack(positions) if positions else np.empty((0, len(node_ids)), dtype=np.uint64)
+
+    @staticmethod
+    def _test(words, positions):
+        bits = np.uint64(1) << (positions & np.uint64(63))
+        return ((words[positions >> np.uint64(6)] & bits) != 0).all(axis=0)
+
+    @staticmethod
+    def _set(words, positions):
+        np.bitwise_or.at(words, (positions >> np.uint64(6)).ravel(), np.uint64(1) << (positions.ravel() & np.uint64(63)))
+
+    def add(self, node_ids):
+        # node_ids must be the distinct nodes of one graph
+        positions = self._positions(np.asarray(node_ids, dtype=np.uint64))
+        self._set(self._shared, positions[:, self._test(self._seen, positions)])
+        self._set(self._seen, positions)
+
+    def might_be_shared(self, node_ids):
+        return self._test(self._shared, self._positions(np.asarray(node_ids, dtype=np.uint64)))
@@ -0,0 +1,131 @@
+import threading
+import weakref
+
+from combined import create_nx_dg, intern_dependency_list
+from symbols import PredecessorSetTable, SymbolTable, outgrown
+
+CHUNK_SIZE = 256
+
+
+class GraphVersion:
+    """
+    An immutable version of the merged dependency graph.
+    Predecessor sets are stored in fixed-size tuples (chunks) indexed by interned node ID;
+    versions share every chunk a write did not touch. None marks an undeclared node.
+    """
+
+    __slots__ = ("version", "chunks", "chunk_size", "num_nodes", "num_edges", "__weakref__")
+
+    def __init__(self, version, chunks, chunk_size, num_nodes, num_edges):
+        self.version = version
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.num_nodes = num_nodes
+        self.num_edges = num_edges
+
+    def predecessors(self, node):
+        chunk_index, offset = divmod(node, self.chunk_size)
+        if chunk_index >= len(self.chunks):
+            return None
+        return self.chunks[chunk_index][offset]
+
+    def __contains__(self, node):
+        return self.predecessors(node) is not None
+
+    def __len__(self):
+        return self.num_nodes
+
+    def items(self):
+        for chunk_index, chunk in enumerate(self.chunks):
+            base = chunk_index * self.chunk_size
+            for offset, preds in enumerate(chunk):
+                if preds is not None:
+                    yield base + offset, preds
+
+    def edges(self):
+        for node, preds in self.items():
+            for pred in preds:
+                yield pred, node
+
+    def to_dependency_list(self):
+        return {node: list(preds) for node, preds in self.items()}
+
+    def to_nx(self):
+        return create_nx_dg(self.to_dependency_list(), symbols=None)
+
+
+class VersionedGraph:
+    """
+    A merged dependency graph with copy-on-write versions.
+    Readers call snapshot() and get the current immutable GraphVersion without copying
+    or locking; a writer's merge() publishes a new version that shares unchanged chunks.
+    Old versions are freed by reference counting once no reader holds them.
+    Every interned name stays in the graph, but the predecessor sets that old versions
+    replaced do not, so the set table is rebuilt from the current version once they
+    dominate it.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, symbols=None, pred_sets=None):
+        self.chunk_size = chunk_size
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.pred_sets = PredecessorSetTable() if pred_sets is None else pred_sets
+        self._empty_chunk = (None,) * chunk_size
+        self._write_lock = threading.Lock()
+        self._live = weakref.WeakValueDictionary()
+        self._current = self._publish(GraphVersion(0, (), chunk_size, 0, 0))
+
+    def _publish(self, version):
+        self._live[version.version] = version
+        self._current = version
+        return version
+
+    def snapshot(self):
+        # A single attribute read is atomic, so readers never see a half-built version
+        return self._current
+
+    def live_versions(self):
+        return sorted(self._live.keys())
+
+    def merge(self, dependency_list):
+        """
+        Unions a dependency list into the graph, like merge_dags_consistency_check.
+        Args:
+            dependency_list (dict): Maps each node name to the names it depends on.
+        Returns:
+            GraphVersion: The newly published version (the current one if nothing changed).
+        """
+        with self._write_lock:
+            # SymbolTable is single-writer, so concurrent merges intern under the lock too
+            interned = intern_dependency_list(dependency_list, self.symbols)
+            base = self._current
+            if outgrown(self.pred_sets, base.num_nodes):
+                # The current version's sets keep their identity in the new table
+                self.pred_sets = PredecessorSetTable()
+                for _, preds in base.items():
+                    self.pred_sets.intern(preds)
+            pred_sets = self.pred_sets
+            chunks = list(base.chunks)
+            copies = {}
+            num_nodes, num_edges = base.num_nodes, base.num_edges
+            for node, dependents in interned.items():
+                chunk_index, offset = divmod(node, self.chunk_size)
+                if chunk_index >= len(chunks):
+                    chunks.extend([self._empty_chunk] * (chunk_index + 1 - len(chunks)))
+                chunk = copies.get(chunk_index)
+                old = (chunk or chunks[chunk_index])[offset]
+                new = pred_sets.union(old if old is not None else pred_sets.empty, pred_sets.intern(dependents))
+                if new is old:
+                    continue
+                if chunk is None:
+                    chunk = copies[chunk_index] = list(chunks[chunk_index])
+                chunk[offset] = new
+                if old is None:
+                    num_nodes += 1
+                    num_edges += len(new)
+                else:
+                    num_edges += len(new) - len(old)
+            if not copies:
+                return base
+            for chunk_index, chunk in copies.items():
+                chunks[chunk_index] = tuple(chunk)
+            return self._publish(GraphVersion(base.version + 1, tuple(chunks), self.chunk_size, num_nodes, num_edges))
@@ -0,0 +1,94 @@
+class SymbolTable:
+    """
+    Maps node names to dense integer IDs so every graph shares one copy of each name.
+    IDs are assigned in first-seen order and never reused.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def intern(self, name):
+        """
+        Returns the ID for name, assigning a new one if the name has not been seen.
+        Args:
+            name (hashable): A node name.
+        Returns:
+            int: The dense ID of the name.
+        """
+        # Fast path: names that are already interned cost a single dict lookup
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = len(self._names)
+            self._ids[name] = node_id
+            self._names.append(name)
+        return node_id
+
+    def id_of(self, name):
+        return self._ids[name]
+
+    def name_of(self, node_id):
+        return self._names[node_id]
+
+    def names_of(self, node_ids):
+        names = self._names
+        return [names[node_id] for node_id in node_ids]
+
+
+# Shared by all input graphs unless a caller passes its own table.
+# Nothing is ever evicted, so long-lived users (watch.py, service.py, snapshots.py) keep
+# their own tables and start a new generation once they are outgrown.
+SYMBOLS = SymbolTable()
+
+
+class PredecessorSetTable:
+    """
+    Hash-conses predecessor sets: each distinct set is stored once as a frozenset,
+    so two interned sets are equal iff they are the same object.
+    """
+
+    def __init__(self):
+        self._sets = {}
+        self.empty = self.intern(())
+
+    def __len__(self):
+        return len(self._sets)
+
+    def intern(self, members):
+        members = frozenset(members)
+        return self._sets.setdefault(members, members)
+
+    def union(self, first, second):
+        # Unions of interned sets, skipping the allocation when one already contains the other
+        if second <= first:
+            return first
+        if first <= second:
+            return second
+        return self.intern(first | second)
+
+
+PREDECESSOR_SETS = PredecessorSetTable()
+
+
+# Tables below this size are never worth rebuilding
+GENERATION_MIN_SIZE = 1 << 16
+
+
+def outgrown(table, live):
+    """
+    Tells a long-lived user to replace a table with a new generation that holds only the
+    live entries, which keeps the rebuild cost amortized O(1) per interned entry.
+    Args:
+        table (SymbolTable or PredecessorSetTable): The table to check.
+        live (int): Upper bound on the entries still referenced.
+    Returns:
+        bool: True once the table exceeds GENERATION_MIN_SIZE entries and more than half
+        of them are garbage.
+    """
+    return len(table) > max(GENERATION_MIN_SIZE, 2 * live)
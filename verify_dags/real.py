@@ -1,13 +1,8 @@
-import networkx as nx
+import os
+import sys
 
-
-# Create a directed graph from a dependency list
-def Create_nx_DG(dependency_list):
-    G = nx.DiGraph()
-    for node, dependents in dependency_list.items():
-        for dependent in dependents:
-            G.add_edge(dependent, node)
-    return G
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from graph_builder import build_digraph as Create_nx_DG
 
 
 # DFS with Recursion Stack
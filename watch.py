@@ -0,0 +1,262 @@
+import argparse
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+
+import networkx as nx
+
+from combined import (build_in_degree_map, create_nx_dg, intern_dependency_list, is_dag_dfs_rec_stack,
+                      is_weakly_connected_dfs_bfs, resolve_dependency_list)
+from pipeline import check_manifest, parse_manifest, read_manifest
+from symbols import PredecessorSetTable, SymbolTable, outgrown
+
+# Above this many added edges, revalidating acyclicity from scratch beats one path search per edge
+INCREMENTAL_DAG_EDGES = 32
+
+
+class ManifestWatcher:
+    """
+    Keeps every manifest's graph, predecessor map and the merged DAG in memory and
+    revalidates only what a changed manifest touches.
+    Manifests are JSON files mapping each node to the list of nodes it depends on.
+    The watcher owns its symbol and predecessor-set tables and rebuilds them once removed
+    or edited manifests have left them mostly garbage.
+    """
+
+    def __init__(self, directory, pattern="*.json", notify=None, symbols=None, pred_sets=None):
+        self.directory = directory
+        self.pattern = pattern
+        self.notify = notify or print_report
+        self.stats = {}  # path -> (mtime_ns, size) of the last good version
+        self.failed_stats = {}  # path -> (mtime_ns, size) of a version that failed to parse
+        self._reset(SymbolTable() if symbols is None else symbols,
+                    PredecessorSetTable() if pred_sets is None else pred_sets)
+
+    def _reset(self, symbols, pred_sets):
+        self.symbols = symbols
+        self.pred_sets = pred_sets
+        self.dependency_lists = {}  # path -> interned dependency list
+        self.in_degree_maps = {}  # path -> node -> hash-consed predecessor set
+        self.results = {}  # path -> (weakly_connected, is_dag)
+        self.node_paths = defaultdict(set)  # node -> paths whose graph contains it
+        self.discrepancies = {}
+        self.merged_dependencies = {}
+        self.merged_graph = nx.DiGraph()
+        self.merged_is_dag = True
+
+    def scan(self):
+        # Compares mtime and size of every manifest with the last poll
+        current = {}
+        for path in glob.glob(os.path.join(self.directory, self.pattern)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            current[path] = (stat.st_mtime_ns, stat.st_size)
+        # A broken save is reported once, not again on every poll until it is fixed
+        changed = [path for path, stat in current.items()
+                   if self.stats.get(path) != stat and self.failed_stats.get(path) != stat]
+        removed = [path for path in self.stats if path not in current]
+        for path in list(self.failed_stats):
+            if path not in current:
+                del self.failed_stats[path]
+        return current, changed, removed
+
+    def poll_once(self):
+        """
+        Reparses changed manifests and revalidates the affected nodes.
+        Returns:
+            dict: The report passed to notify, or None if nothing changed.
+        """
+        current, changed, removed = self.scan()
+        if not changed and not removed:
+            return None
+        start = time.perf_counter()
+        errors = {}
+        affected = set()
+        for path in removed:
+            affected |= self._remove(path)
+            del self.stats[path]
+        for path in sorted(changed):
+            try:
+                dependency_list = parse_manifest(read_manifest(path))
+                check_manifest(dependency_list)
+            except (OSError, ValueError) as error:
+                # Keep the last good version while the file is being edited
+                errors[path] = str(error)
+                self.failed_stats[path] = current[path]
+                continue
+            self.failed_stats.pop(path, None)
+            self.stats[path] = current[path]
+            affected |= self._remove(path)
+            affected |= self._add(path, dependency_list)
+        self._revalidate(affected)
+        # Every node of a live graph is in node_paths and has one predecessor set per graph
+        live_sets = sum(map(len, self.in_degree_maps.values())) + len(self.merged_dependencies)
+        if outgrown(self.symbols, len(self.node_paths)) or outgrown(self.pred_sets, live_sets):
+            self._new_generation()
+
+        report = {
+            "changed": sorted(changed),
+            "removed": sorted(removed),
+            "errors": errors,
+            "graphs": {path: {"weakly_connected": result[0], "is_dag": result[1]}
+                       for path, result in sorted(self.results.items())},
+            "discrepancies": {self.symbols.name_of(node): message for node, message in self.discrepancies.items()},
+            "merged_is_dag": self.merged_is_dag,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+        self.notify(report)
+        return report
+
+    def run(self, interval=0.2):
+        while True:
+            self.poll_once()
+            time.sleep(interval)
+
+    def _add(self, path, dependency_list):
+        interned = intern_dependency_list(dependency_list, self.symbols)
+        G = create_nx_dg(interned, symbols=None)
+        self.dependency_lists[path] = interned
+        self.in_degree_maps[path] = build_in_degree_map(G, self.pred_sets)
+        if len(G):
+            self.results[path] = (is_weakly_connected_dfs_bfs(G), is_dag_dfs_rec_stack(G))
+        else:
+            self.results[path] = (True, True)
+        for node in G:
+            self.node_paths[node].add(path)
+        return set(G)
+
+    def _remove(self, path):
+        in_degree_map = self.in_degree_maps.pop(path, None)
+        if in_degree_map is None:
+            return set()
+        del self.dependency_lists[path]
+        del self.results[path]
+        for node in in_degree_map:
+            self.node_paths[node].discard(path)
+        return set(in_degree_map)
+
+    def _new_generation(self):
+        # Re-interns the current manifests into fresh tables and rebuilds all derived state
+        dependency_lists = {path: resolve_dependency_list(dependency_list, self.symbols)
+                            for path, dependency_list in self.dependency_lists.items()}
+        self._reset(SymbolTable(), PredecessorSetTable())
+        affected = set()
+        for path, dependency_list in dependency_lists.items():
+            affected |= self._add(path, dependency_list)
+        self._revalidate(affected)
+
+    def _revalidate(self, nodes):
+        empty = self.pred_sets.empty
+        added_edges = []
+        dangling = set()
+        for node in nodes:
+            paths = self.node_paths[node]
+            sets = [self.in_degree_maps[path][node] for path in paths]
+            sets = [preds for preds in sets if preds is not empty]
+            if sets and not all(preds is sets[0] for preds in sets):
+                self.discrepancies[node] = "In-degree similarity discrepancy found"
+            else:
+                self.discrepancies.pop(node, None)
+
+            # Merged predecessors come only from manifests that declare the node
+            merged = empty
+            declared = False
+            for path in paths:
+                dependents = self.dependency_lists[path].get(node)
+                if dependents is not None:
+                    declared = True
+                    merged = self.pred_sets.union(merged, self.pred_sets.intern(dependents))
+            old = self.merged_dependencies.get(node, empty)
+            if declared:
+                self.merged_dependencies[node] = merged
+                self.merged_graph.add_node(node)
+            else:
+                self.merged_dependencies.pop(node, None)
+                dangling.add(node)
+            if merged is not old:
+                self.merged_graph.remove_edges_from((src, node) for src in old - merged)
+                dangling |= old - merged
+                added_edges.extend((src, node) for src in merged - old)
+            if not paths:
+                del self.node_paths[node]
+        self.merged_graph.add_edges_from(added_edges)
+        # Undeclared nodes stay in the merged graph only while an edge refers to them
+        self.merged_graph.remove_nodes_from([node for node in dangling if node not in self.merged_dependencies
+                                             and node in self.merged_graph and not self.merged_graph.degree(node)])
+
+        if not self.merged_is_dag or len(added_edges) > INCREMENTAL_DAG_EDGES:
+            # A full check is O(V + E), the worst case of a single path search
+            self.merged_is_dag = nx.is_directed_acyclic_graph(self.merged_graph)
+        else:
+            # Removing edges cannot close a cycle; a new edge src -> dst closes one iff dst reaches src
+            self.merged_is_dag = not any(nx.has_path(self.merged_graph, dst, src) for src, dst in added_edges)
+
+
+class SocketBroadcaster:
+    """
+    Sends every report as a JSON line to all clients connected to a local TCP port.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.clients = []
+        self.lock = threading.Lock()
+        self.server = socket.create_server((host, port))
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.server.accept()
+            with self.lock:
+                self.clients.append(client)
+
+    def __call__(self, report):
+        line = (json.dumps(report) + "\n").encode()
+        with self.lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(line)
+                except OSError:
+                    self.clients.remove(client)
+                    client.close()
+
+
+def print_report(report):
+    for path in report["changed"]:
+        result = report["graphs"].get(path)
+        if path in report["errors"]:
+            print(f"{path}: parse error: {report['errors'][path]}")
+        elif result is not None:
+            print(f"{path}: Weakly Connected: {result['weakly_connected']}, Is DAG: {result['is_dag']}")
+    for path in report["removed"]:
+        print(f"{path}: removed")
+    if report["discrepancies"]:
+        print("Dependency Consistency Check failed with discrepancies:", report["discrepancies"])
+    else:
+        print("Dependency Consistency Check: Passed")
+    print(f"Merged graph is a DAG: {report['merged_is_dag']} ({report['elapsed_ms']} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revalidate dependency manifests whenever they change.")
+    parser.add_argument("directory", help="Directory containing the JSON manifests")
+    parser.add_argument("--pattern", default="*.json")
+    parser.add_argument("--interval", type=float, default=0.2, help="Polling interval in seconds")
+    parser.add_argument("--port", type=int, help="Also push JSON reports to clients on this localhost port")
+    args = parser.parse_args()
+
+    if args.port is None:
+        notify = print_report
+    else:
+        broadcaster = SocketBroadcaster(port=args.port)
+
+        def notify(report):
+            print_report(report)
+            broadcaster(report)
+
+    ManifestWatcher(args.directory, args.pattern, notify).run(args.interval)
@@ -0,0 +1,165 @@
+import random
+
+# Seeded generators for families of dependency lists.
+# Every generator maps each node name to the names it depends on, like the manifests,
+# and returns the same lists for the same arguments.
+
+
+def layered_graph(num_nodes, num_layers=20, fan_in=4, seed=0, prefix="n"):
+    """
+    Generates a layered build graph: every node depends only on nodes in earlier layers.
+    Args:
+        num_nodes (int): Number of nodes.
+        num_layers (int): Number of layers; the first layer has no dependencies.
+        fan_in (int): Maximum dependencies per node.
+        seed (int): Random seed.
+        prefix (str): Prefix of the node names.
+    Returns:
+        dict: A dependency list that is a DAG.
+    """
+    rng = random.Random(seed)
+    layer_size = max(1, num_nodes // num_layers)
+    dependency_list = {}
+    for i in range(num_nodes):
+        layer_start = (i // layer_size) * layer_size
+        if layer_start == 0:
+            dependency_list[f"{prefix}{i}"] = []
+            continue
+        # Mostly the previous layer, sometimes any earlier one
+        previous_start = max(0, layer_start - layer_size)
+        deps = {rng.randrange(previous_start, layer_start) if rng.random() < 0.8 else rng.randrange(layer_start)
+                for _ in range(rng.randint(1, fan_in))}
+        dependency_list[f"{prefix}{i}"] = [f"{prefix}{dep}" for dep in sorted(deps)]
+    return dependency_list
+
+
+def power_law_graph(num_nodes, num_base=50, fan_in=4, exponent=1.5, seed=0, prefix="n", base_prefix="lib"):
+    """
+    Generates a graph whose nodes depend on a few shared base libraries chosen with
+    power-law (Zipf) popularity, plus earlier nodes chosen by preferential attachment.
+    Args:
+        num_nodes (int): Number of non-library nodes.
+        num_base (int): Number of shared base libraries.
+        fan_in (int): Maximum dependencies per node.
+        exponent (float): Zipf exponent of library popularity.
+        seed (int): Random seed.
+        prefix (str): Prefix of the node names.
+        base_prefix (str): Prefix of the library names.
+    Returns:
+        dict: A dependency list that is a DAG.
+    """
+    rng = random.Random(seed)
+    libraries = [f"{base_prefix}{i}" for i in range(num_base)]
+    weights = [1 / (rank + 1) ** exponent for rank in range(num_base)]
+    dependency_list = {library: [] for library in libraries}
+    # Every edge adds its target here once, so sampling from it is degree-proportional
+    attachment = []
+    for i in range(num_nodes):
+        deps = set(rng.choices(libraries, weights, k=rng.randint(1, 2)))
+        if attachment:
+            deps.update(rng.choice(attachment) for _ in range(rng.randint(0, fan_in - len(deps))))
+        name = f"{prefix}{i}"
+        dependency_list[name] = sorted(deps)
+        attachment.extend(dep for dep in deps if not dep.startswith(base_prefix))
+        attachment.append(name)
+    return dependency_list
+
+
+def team_graphs(base, num_teams=8, coverage=0.8, num_conflicts=10, seed=0):
+    """
+    Generates near-duplicate views of one graph, as maintained by separate teams.
+    Each team declares a random subset of the base nodes; some teams then change the
+    dependencies of a few shared nodes, which the consistency check must report.
+    Args:
+        base (dict): The shared dependency list; a node may only depend on nodes listed before it.
+        num_teams (int): Number of team graphs.
+        coverage (float): Fraction of the base nodes each team declares.
+        num_conflicts (int): Number of nodes given a conflicting declaration.
+        seed (int): Random seed.
+    Returns:
+        tuple: (dependency_lists, conflicted) with the list of team graphs and the set of
+        node names given conflicting dependencies.
+    """
+    rng = random.Random(seed)
+    names = list(base)
+    position = {node: index for index, node in enumerate(names)}
+    teams = [{node: list(deps) for node, deps in base.items() if rng.random() < coverage} for _ in range(num_teams)]
+    conflicted = set()
+    for _ in range(10 * num_conflicts):
+        if len(conflicted) == num_conflicts:
+            break
+        team = rng.choice(teams)
+        node = rng.choice(names)
+        if not team.get(node) or node in conflicted:
+            continue
+        # Swap one dependency for an earlier node, which never depends on this one
+        replacement = names[rng.randrange(position[node])]
+        if replacement in team[node]:
+            continue
+        team[node] = team[node][1:] + [replacement]
+        conflicted.add(node)
+    return teams, conflicted
+
+
+def inject_cycles(dependency_list, num_cycles=1, max_length=5, seed=0):
+    """
+    Closes cycles in a copy of a dependency list by making a node depend on one of its
+    transitive dependents.
+    Args:
+        dependency_list (dict): The dependency list; it is not modified.
+        num_cycles (int): Number of cycles to close.
+        max_length (int): Maximum number of dependency hops followed to find the dependent.
+        seed (int): Random seed.
+    Returns:
+        tuple: (dependency_list, cycle_edges) with the modified copy and the added
+        (dependency, node) edges.
+    """
+    rng = random.Random(seed)
+    result = {node: list(deps) for node, deps in dependency_list.items()}
+    declared = [node for node, deps in result.items() if deps]
+    cycle_edges = []
+    for _ in range(num_cycles * 10):
+        if len(cycle_edges) == num_cycles or not declared:
+            break
+        # Walk down dependencies from a dependent node; the walk's start depends on its end
+        start = node = rng.choice(declared)
+        for _ in range(rng.randint(1, max_length)):
+            deps = result.get(node)
+            if not deps:
+                break
+            node = rng.choice(deps)
+        if node == start or node not in result or start in result[node]:
+            continue
+        result[node].append(start)
+        cycle_edges.append((start, node))
+    return result, cycle_edges
+
+
+FAMILIES = ("layered", "power_law", "teams", "cycles")
+
+
+def generate_workload(family, num_nodes, num_graphs=4, seed=0):
+    """
+    Generates the dependency lists of one workload family.
+    Args:
+        family (str): One of FAMILIES.
+        num_nodes (int): Approximate number of nodes per graph.
+        num_graphs (int): Number of graphs to merge.
+        seed (int): Random seed.
+    Returns:
+        list: The dependency lists.
+    """
+    if family == "layered":
+        # Overlapping slices of one layered graph, so merges share most nodes
+        return team_graphs(layered_graph(num_nodes, seed=seed), num_graphs, num_conflicts=0, seed=seed)[0]
+    if family == "power_law":
+        base = power_law_graph(num_nodes, seed=seed)
+        return team_graphs(base, num_graphs, num_conflicts=0, seed=seed)[0]
+    if family == "teams":
+        base = layered_graph(num_nodes, seed=seed)
+        return team_graphs(base, num_graphs, num_conflicts=max(1, num_nodes // 100), seed=seed)[0]
+    if family == "cycles":
+        graphs = team_graphs(power_law_graph(num_nodes, seed=seed), num_graphs, num_conflicts=0, seed=seed)[0]
+        graphs[0] = inject_cycles(graphs[0], num_cycles=max(1, num_nodes // 1000), seed=seed)[0]
+        return graphs
+    raise ValueError(f"unknown workload family {family!r}; expected one of {FAMILIES}")